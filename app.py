@@ -10,6 +10,8 @@ import requests
 import json
 from trade_analysis import AdvancedTradeAnalysis
 from modules.trade_data import TradeData
+from modules.shared_dataset import registry
+from modules.filter_cache import filter_cache
 
 # Import page functions
 from modules.dashboard_page import show_dashboard
@@ -43,7 +45,8 @@ class Auth:
 # Initialize session state
 if 'initialized' not in st.session_state:
     st.session_state.initialized = False
-    st.session_state.trade_data_instance = TradeData()
+    # Sessions share one process-wide dataset; only filters and UI state are per session
+    st.session_state.trade_data_instance = TradeData(registry=registry, cache=filter_cache)
     st.session_state.auth = Auth()
 
 class EconomicData:
@@ -123,7 +126,7 @@ def initialize_components():
     if not st.session_state.initialized:
         # Initialize TradeData instance if not already initialized
         if 'trade_data_instance' not in st.session_state:
-            st.session_state.trade_data_instance = TradeData()
+            st.session_state.trade_data_instance = TradeData(registry=registry, cache=filter_cache)
         
         # Initialize other components
         st.session_state.economic_data = EconomicData()
@@ -454,6 +457,67 @@ def register_page():
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+@st.fragment(run_every=1)
+def refresh_progress_panel():
+    """Poll a running refresh; rerun the page once it finishes so polling stops"""
+    status = st.session_state.trade_data_instance.refresh_status()
+    if not status['running']:
+        st.rerun(scope="app")
+    st.progress(status['progress'], text=status['message'])
+
+def refresh_status_panel():
+    """Show background refresh progress and the data version this session reads"""
+    trade_data = st.session_state.trade_data_instance
+    status = trade_data.refresh_status()
+    if status and status['running']:
+        refresh_progress_panel()
+        return
+    if status and status['error']:
+        st.error(status['message'])
+    if status and status['version'] is not None and status['version'] > (trade_data.data_version or 0):
+        # The swap has happened; move this session to the new version
+        trade_data.get_sample_trade_data()
+    st.caption(f"Data version: {trade_data.data_version}")
+
+# Export format label -> pipeline format
+EXPORT_FORMAT_OPTIONS = {
+    "CSV": "csv",
+    "CSV (gzip)": "csv.gz",
+    "CSV (zstd)": "csv.zst",
+    "Parquet": "parquet",
+    "Excel": "xlsx"
+}
+
+def current_view_filters():
+    """Collect the sidebar filter selections as TradeData.filter_data arguments"""
+    min_value = st.session_state.get("min_trade_value_filter", 0.0)
+    return {
+        'years': st.session_state.get("year_filter"),
+        'countries': st.session_state.get("country_filter"),
+        'min_trade_value': min_value * 1e9 if min_value else None,
+        'trade_type': st.session_state.get("trade_type")
+    }
+
+@st.fragment(run_every=1)
+def export_progress_panel():
+    """Poll a running export; rerun the page once it finishes or fails so polling stops"""
+    status = st.session_state.trade_data_instance.export_status()
+    if not status['running']:
+        st.rerun(scope="app")
+    st.progress(status['progress'], text=status['message'])
+
+def export_status_panel():
+    """Show progress of this session's background export"""
+    status = st.session_state.trade_data_instance.export_status()
+    if not status:
+        return
+    if status['running']:
+        export_progress_panel()
+    elif status['error']:
+        st.error(status['message'])
+    else:
+        st.success(status['message'])
+
 def main_app():
     initialize_components()
     
@@ -507,24 +571,29 @@ def main_app():
     # Data management section
     with st.sidebar.expander("📂 Data Management", expanded=True):
         if st.button("🔄 Refresh Data"):
-            success = st.session_state.trade_data_instance.refresh_data()
-            if success:
-                st.success("Data refreshed successfully!")
+            started, message = st.session_state.trade_data_instance.start_background_refresh()
+            if started:
+                st.info(message)
             else:
-                st.error("Failed to refresh data")
+                st.warning(message)
+        refresh_status_panel()
         
         export_format = st.selectbox(
             "Export Format",
-            ["CSV", "Excel"],
+            list(EXPORT_FORMAT_OPTIONS.keys()),
             key="export_format"
         )
         
         if st.button("📥 Export Current View"):
-            success, message = st.session_state.trade_data_instance.export_data(format=export_format.lower())
+            success, message = st.session_state.trade_data_instance.start_export(
+                format=EXPORT_FORMAT_OPTIONS[export_format],
+                filters=current_view_filters()
+            )
             if success:
-                st.success(message)
+                st.info(message)
             else:
                 st.error(message)
+        export_status_panel()
     
     # Filters section
     st.sidebar.markdown("---")
@@ -554,10 +623,11 @@ def main_app():
         min_trade_value = st.slider(
         "Minimum Trade Value (Billion USD)",
         min_value=0.0,
-            max_value=float(st.session_state.trade_data_instance.get_sample_trade_data()['TradeValue'].max() / 1e9),
+            max_value=st.session_state.trade_data_instance.get_trade_value_range()[1] / 1e9,
         value=0.0,
         step=0.1,
-        format="%.1fB"
+        format="%.1fB",
+        key="min_trade_value_filter"
     )
     
     # Advanced filters in a separate expander
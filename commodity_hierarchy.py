@@ -0,0 +1,159 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Sequence
+
+# HS and SITC codes for the legacy "Category - Item" commodity names (representative 6-digit lines)
+BUNDLED_COMMODITY_CODES = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                       'reference_data', 'commodity_codes.csv')
+
+HS_SECTIONS = {
+    'I': 'Live animals; animal products',
+    'II': 'Vegetable products',
+    'III': 'Animal or vegetable fats',
+    'IV': 'Prepared foodstuffs',
+    'V': 'Mineral products',
+    'VI': 'Chemical products',
+    'VII': 'Plastics and rubber',
+    'VIII': 'Raw hides and skins',
+    'IX': 'Wood and articles',
+    'X': 'Pulp of wood',
+    'XI': 'Textiles and textile articles',
+    'XII': 'Footwear, headgear',
+    'XIII': 'Articles of stone',
+    'XIV': 'Natural or cultured pearls',
+    'XV': 'Base metals',
+    'XVI': 'Machinery and mechanical',
+    'XVII': 'Transport equipment',
+    'XVIII': 'Optical, photographic',
+    'XIX': 'Arms and ammunition',
+    'XX': 'Miscellaneous manufactured',
+    'XXI': 'Works of art',
+    'XXII': 'Special transactions'
+}
+
+SITC_SECTIONS = {
+    '0': 'Food and live animals',
+    '1': 'Beverages and tobacco',
+    '2': 'Crude materials, inedible',
+    '3': 'Mineral fuels, lubricants',
+    '4': 'Animal and vegetable oils',
+    '5': 'Chemicals',
+    '6': 'Manufactured goods',
+    '7': 'Machinery and transport',
+    '8': 'Miscellaneous manufactured',
+    '9': 'Commodities not classified'
+}
+
+# First HS chapter of each section, in section order
+HS_SECTION_FIRST_CHAPTER = [1, 6, 15, 16, 25, 28, 39, 41, 44, 47, 50, 64,
+                            68, 71, 72, 84, 86, 90, 93, 94, 97, 98]
+
+# Level name -> number of leading code digits (section is derived from the chapter)
+HS_LEVELS = {'section': 2, 'chapter': 2, 'heading': 4, 'subheading': 6}
+SITC_LEVELS = {'sitc1': 1, 'sitc2': 2, 'sitc3': 3, 'sitc4': 4, 'sitc5': 5}
+LEVELS = tuple(HS_LEVELS) + tuple(SITC_LEVELS)
+
+def load_commodity_codes(path: str = BUNDLED_COMMODITY_CODES) -> pd.DataFrame:
+    """Load the offline Commodity/HS/SITC table, keeping leading zeros"""
+    return pd.read_csv(path, dtype=str)
+
+def hs_sections_of(chapters: np.ndarray) -> np.ndarray:
+    """Roman-numeral HS section for each integer chapter"""
+    names = np.array(list(HS_SECTIONS))
+    return names[np.searchsorted(HS_SECTION_FIRST_CHAPTER, chapters, side='right') - 1]
+
+class CommodityHierarchy:
+    """Commodity codes mapped once to integer node ids at every HS and SITC level
+
+    Commodities are resolved to an HS code (from the code table, else a
+    6-digit code or 'HSnn' chapter found in the label) and a SITC code (from
+    the code table, else a 'SITC nnnnn' label or a bare code of up to five
+    digits). Each level then holds one node id per commodity, -1 where the
+    code is too short or missing, so grouping by section, chapter or SITC
+    division is an array lookup instead of a string scan.
+    """
+
+    def __init__(self, commodities: Sequence, codes: Optional[pd.DataFrame] = None):
+        codes = load_commodity_codes() if codes is None else codes
+        self.commodities = pd.Index(np.asarray(pd.unique(np.asarray(commodities, dtype=object))), name='Commodity')
+        labels = pd.Series(self.commodities, dtype=object)
+        table = codes.drop_duplicates('Commodity').set_index('Commodity')
+        hs = labels.map(table['HS']) if 'HS' in table else pd.Series(np.nan, index=labels.index)
+        parsed = labels.str.extract(r'(?<!\d)(\d{6})(?!\d)')[0].fillna(labels.str.extract(r'^HS(\d{2})\b')[0])
+        self.hs_codes = hs.fillna(parsed).to_numpy(dtype=object)
+        sitc = labels.map(table['SITC']) if 'SITC' in table else pd.Series(np.nan, index=labels.index)
+        sitc = sitc.fillna(labels.str.extract(r'^SITC (\d{1,5})\b')[0])
+        # Bare numeric labels ('0412', '333') that did not resolve to HS are SITC codes
+        bare = labels.str.extract(r'^\s*(\d{1,5})\s*$')[0].where(pd.isna(self.hs_codes))
+        self.sitc_codes = sitc.fillna(bare).to_numpy(dtype=object)
+
+        self.nodes: Dict[str, pd.Index] = {}
+        self.codes: Dict[str, np.ndarray] = {}
+        for level in LEVELS:
+            keys = self._level_keys(level)
+            node_ids, uniques = pd.factorize(keys, sort=True, use_na_sentinel=True)
+            self.nodes[level] = pd.Index(np.asarray(uniques, dtype=object), name=level)
+            self.codes[level] = node_ids.astype(np.int32)
+
+    def _level_keys(self, level: str) -> pd.Series:
+        if level in SITC_LEVELS:
+            source, digits = pd.Series(self.sitc_codes, dtype=object), SITC_LEVELS[level]
+        else:
+            source, digits = pd.Series(self.hs_codes, dtype=object), HS_LEVELS[level]
+        keys = source.where(source.str.len() >= digits).str[:digits]
+        if level == 'section':
+            chapters = pd.to_numeric(keys, errors='coerce')
+            valid = chapters.notna().to_numpy()
+            sections = np.full(len(keys), None, dtype=object)
+            sections[valid] = hs_sections_of(chapters[valid].to_numpy(dtype=int))
+            # Categorical so sections sort in numeral order (I, II, ..., IX, X) rather than as text
+            keys = pd.Series(pd.Categorical(sections, categories=list(HS_SECTIONS)))
+        return keys
+
+    def node_codes(self, level: str, commodities) -> np.ndarray:
+        """Node id at `level` for each value of `commodities`, -1 if unknown
+
+        Values are factorized first, so a long categorical column costs one
+        pass over its integer codes.
+        """
+        if level not in self.codes:
+            raise KeyError(f"Unknown commodity level: {level}")
+        value_codes, uniques = pd.factorize(commodities)
+        positions = self.commodities.get_indexer(np.asarray(uniques, dtype=object))
+        unique_nodes = np.where(positions >= 0, self.codes[level][positions], -1)
+        return np.where(value_codes >= 0, unique_nodes[value_codes], -1)
+
+    def members(self, level: str, node: str) -> pd.Index:
+        """Commodities that fall under `node` at `level`"""
+        position = self.nodes[level].get_indexer([node])[0]
+        return self.commodities[self.codes[level] == position] if position >= 0 else self.commodities[:0]
+
+    def describe(self, level: str) -> pd.Series:
+        """Display name of every node at `level`; codes stand in where no name is known"""
+        names = {'section': HS_SECTIONS, 'sitc1': SITC_SECTIONS}.get(level, {})
+        nodes = self.nodes[level]
+        return pd.Series([names.get(node, node) for node in nodes], index=nodes, name='Description')
+
+    def rollup(self, cube, level: str, by: Sequence[str] = ('Reporter',),
+               where: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+        """TradeValue and row counts of a TradeCube per `by` and node at `level`
+
+        Works on the cube's cells and integer codes; commodities without a
+        node at this level are left out.
+        """
+        by = list(by)
+        cells = cube.cells(by + ['Commodity'], where)
+        codes = cells.codes()
+        nodes = self.node_codes(level, cube.labels['Commodity'])[codes['Commodity']]
+        known = nodes >= 0
+        keys = [codes[d][known] for d in by] + [nodes[known]]
+        shape = tuple(len(cube.labels[d]) for d in by) + (len(self.nodes[level]),)
+        group_ids, inverse = np.unique(np.ravel_multi_index(keys, shape), return_inverse=True)
+        group_codes = np.unravel_index(group_ids, shape)
+
+        columns = {d: cube.labels[d][group_codes[i]] for i, d in enumerate(by)}
+        columns[level] = self.nodes[level][group_codes[-1]]
+        columns['TradeValue'] = np.bincount(inverse, weights=cells.sums[known], minlength=len(group_ids))
+        columns['Count'] = np.bincount(inverse, weights=cells.counts[known], minlength=len(group_ids)).astype(np.int64)
+        return pd.DataFrame(columns)
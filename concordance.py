@@ -0,0 +1,116 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Optional
+from commodity_hierarchy import CommodityHierarchy
+
+# HS -> SITC correspondences with weights: chapter-level splits plus exact 6-digit lines
+BUNDLED_CONCORDANCE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                   'reference_data', 'hs_sitc_concordance.csv')
+CLASSIFICATIONS = ('HS', 'SITC')
+
+def load_concordance(path: str = BUNDLED_CONCORDANCE) -> pd.DataFrame:
+    """Load the offline HS/SITC/Weight table, keeping leading zeros"""
+    return pd.read_csv(path, dtype={'HS': str, 'SITC': str})
+
+def commodity_label(classification: str, code: str) -> str:
+    """Commodity label for a code, in the form CommodityHierarchy parses back"""
+    if classification == 'HS':
+        return f"HS{code[:2]} - {code}" if len(code) > 2 else f"HS{code}"
+    return f"SITC {code}"
+
+class Concordance:
+    """Weighted many-to-many mapping between HS and SITC codes
+
+    Codes match the table on their longest prefix, so a table can mix exact
+    6-digit lines with chapter-level fallbacks. Weights are normalised to
+    sum to one per source code; the SITC -> HS direction reuses the HS -> SITC
+    weights, which treats every HS code feeding a SITC code as equally large.
+    """
+
+    def __init__(self, table: Optional[pd.DataFrame] = None):
+        self.table = load_concordance() if table is None else table
+        self._mappings = {target: self._normalised(source, target)
+                          for source, target in (('HS', 'SITC'), ('SITC', 'HS'))}
+
+    def _normalised(self, source: str, target: str) -> pd.DataFrame:
+        weights = self.table.groupby([source, target])['Weight'].sum()
+        weights = weights / weights.groupby(level=source).transform('sum')
+        return weights.reset_index().rename(columns={source: 'Source', target: 'Target'})
+
+    def mapping(self, target: str = 'SITC') -> pd.DataFrame:
+        """Source code, target code and weight rows for conversion into `target`"""
+        return self._mappings[self._check(target)].copy()
+
+    @staticmethod
+    def _check(target: str) -> str:
+        target = target.upper()
+        if target not in CLASSIFICATIONS:
+            raise ValueError(f"Unknown classification: {target} (choose from {', '.join(CLASSIFICATIONS)})")
+        return target
+
+    def match(self, codes, target: str = 'SITC') -> np.ndarray:
+        """Position in the mapping's distinct source codes of each code's longest known prefix, -1 if none"""
+        sources = pd.Index(self._mappings[self._check(target)]['Source'].unique())
+        codes = pd.Series(np.asarray(codes, dtype=object), dtype=object)
+        lengths = codes.str.len().fillna(0).to_numpy(dtype=int)
+        matched = np.full(len(codes), -1)
+        for length in range(int(lengths.max(initial=0)), 0, -1):
+            todo = (matched < 0) & (lengths >= length)
+            if todo.any():
+                matched[todo] = sources.get_indexer(codes[todo].str[:length])
+        return matched
+
+    def convert(self, data: pd.DataFrame, target: str = 'SITC', column: str = 'Commodity',
+                value_column: str = 'TradeValue') -> pd.DataFrame:
+        """Re-express `data` in the `target` classification
+
+        Each row is repeated once per target code of its commodity with its
+        value scaled by the mapping weight, so totals are preserved. The
+        mapping is resolved once per distinct commodity and applied to the
+        rows by integer code. Commodities without a source code or a matching
+        mapping keep their label and value.
+        """
+        target = self._check(target)
+        mapping = self._mappings[target]
+        row_codes, uniques = pd.factorize(data[column])
+        if not len(uniques):
+            return data.copy()
+        hierarchy = CommodityHierarchy(uniques)
+        source_codes = hierarchy.sitc_codes if target == 'HS' else hierarchy.hs_codes
+        matched = self.match(source_codes, target)
+
+        # Mapping rows for each distinct source code: [start, start + count)
+        source_ids, sources = pd.factorize(mapping['Source'])
+        counts = np.bincount(source_ids, minlength=len(sources))
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        target_ids, targets = pd.factorize(mapping['Target'])
+        labels = pd.Index([commodity_label(target, code) for code in targets])
+        unmatched = matched < 0
+        labels = labels.append(pd.Index(np.asarray(uniques, dtype=object)[unmatched]))
+        categories = labels.unique().sort_values()
+        label_ids = categories.get_indexer(labels)
+
+        # Flatten (distinct commodity -> output labels and weights)
+        per_unique = np.where(unmatched, 1, counts[matched])
+        unique_start = np.cumsum(per_unique) - per_unique
+        owner = np.repeat(np.arange(len(uniques)), per_unique)
+        within = np.arange(per_unique.sum()) - unique_start[owner]
+        mapping_row = starts[matched[owner]] + within
+        unmatched_rank = np.cumsum(unmatched) - 1
+        flat_label = np.where(unmatched[owner], label_ids[len(targets) + unmatched_rank[owner]],
+                              label_ids[target_ids[mapping_row]])
+        flat_weight = np.where(unmatched[owner], 1.0, mapping['Weight'].to_numpy(dtype=float)[mapping_row])
+
+        # Expand rows; rows without a commodity pass through unchanged
+        present = row_codes >= 0
+        per_row = np.where(present, per_unique[np.maximum(row_codes, 0)], 1)
+        rows = np.repeat(np.arange(len(data)), per_row)
+        row_start = np.cumsum(per_row) - per_row
+        flat = unique_start[np.maximum(row_codes, 0)][rows] + np.arange(len(rows)) - row_start[rows]
+        keep_label = present[rows]
+
+        result = data.take(rows).reset_index(drop=True)
+        result[column] = pd.Categorical.from_codes(np.where(keep_label, flat_label[flat], -1), categories)
+        result[value_column] = result[value_column].to_numpy(dtype=float) * np.where(keep_label, flat_weight[flat], 1.0)
+        return result
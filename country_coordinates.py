@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+# Country coordinates (approximate) of the built-in sample countries
+COUNTRY_COORDS = {
+    'USA': {'lat': 37.0902, 'lon': -95.7129},
+    'China': {'lat': 35.8617, 'lon': 104.1954},
+    'Germany': {'lat': 51.1657, 'lon': 10.4515},
+    'Japan': {'lat': 36.2048, 'lon': 138.2529},
+    'UK': {'lat': 55.3781, 'lon': -3.4360},
+    'France': {'lat': 46.2276, 'lon': 2.2137},
+    'India': {'lat': 20.5937, 'lon': 78.9629},
+    'Italy': {'lat': 41.8719, 'lon': 12.5674},
+    'Brazil': {'lat': -14.2350, 'lon': -51.9253},
+    'Canada': {'lat': 56.1304, 'lon': -106.3468}
+}
+
+def default_country_table() -> pd.DataFrame:
+    """Country/Lat/Lon table of the built-in countries"""
+    return pd.DataFrame({
+        'Country': list(COUNTRY_COORDS),
+        'Lat': [c['lat'] for c in COUNTRY_COORDS.values()],
+        'Lon': [c['lon'] for c in COUNTRY_COORDS.values()]
+    })
+
+def attach_country_coordinates(data: pd.DataFrame, countries: pd.DataFrame = None) -> pd.DataFrame:
+    """Add Reporter/Partner Lat/Lon columns from a country dimension table
+
+    `data` may carry country names (Reporter/Partner) or star-schema keys
+    (ReporterId/PartnerId); for keys the country names are added as well.
+    Without `countries`, names are looked up in the built-in country table.
+    """
+    data = data.copy()
+    key, dim_key = ('ReporterId', 'CountryId') if 'ReporterId' in data.columns else ('Reporter', 'Country')
+    if countries is None:
+        if key == 'ReporterId':
+            raise ValueError("Country keys (ReporterId/PartnerId) need the star schema's countries table")
+        if 'Reporter' not in data.columns:
+            raise ValueError("Trade data needs Reporter/Partner (or ReporterId/PartnerId) columns to place countries")
+        countries = default_country_table()
+    dim_index = pd.Index(countries[dim_key])
+    # Trailing NaN row for countries missing from the dimension (indexer -1)
+    lat = np.append(countries['Lat'].to_numpy(dtype=float), np.nan)
+    lon = np.append(countries['Lon'].to_numpy(dtype=float), np.nan)
+    names = np.append(countries['Country'].to_numpy(dtype=object), None)
+    for side in ('Reporter', 'Partner'):
+        positions = dim_index.get_indexer(data[key.replace('Reporter', side)])
+        if side not in data.columns:
+            data[side] = names[positions]
+        data[f'{side}_Lat'] = lat[positions]
+        data[f'{side}_Lon'] = lon[positions]
+    return data
@@ -2,15 +2,41 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 import random
+import os
+import time
+from itertools import permutations
 import streamlit as st
+from country_coordinates import COUNTRY_COORDS, attach_country_coordinates
+
+# Benchmark workload profiles, keyed by scale factor. Every profile yields
+# exactly years x countries x partners_per_reporter x codes_per_pair rows,
+# i.e. 100,000 rows per unit of scale factor.
+SCALE_FACTORS = {
+    1: {'countries': 25, 'years': 5, 'commodity_codes': 200,
+        'partners_per_reporter': 20, 'codes_per_pair': 40},        # 100,000 rows
+    10: {'countries': 100, 'years': 10, 'commodity_codes': 1000,
+         'partners_per_reporter': 25, 'codes_per_pair': 40},       # 1,000,000 rows
+    100: {'countries': 250, 'years': 20, 'commodity_codes': 5000,
+          'partners_per_reporter': 50, 'codes_per_pair': 40},      # 10,000,000 rows
+    1000: {'countries': 250, 'years': 25, 'commodity_codes': 5000,
+           'partners_per_reporter': 200, 'codes_per_pair': 80},    # 100,000,000 rows
+}
+
+TRADE_FLOWS = ['Export', 'Import']
+
+# HS chapters 01-97 (77 is reserved)
+HS_CHAPTERS = [chapter for chapter in range(1, 98) if chapter != 77]
 
 class TradeDataGenerator:
-    def __init__(self):
+    def __init__(self, scale_factor=None):
         self.countries = [
             'USA', 'China', 'Germany', 'Japan', 'UK', 'France', 'India', 
             'Italy', 'Brazil', 'Canada'
         ]  # Reduced from 20 to 10 countries
         
+        # Copied, since scale-factor profiles add synthetic countries
+        self.country_coords = {country: dict(coords) for country, coords in COUNTRY_COORDS.items()}
+        
         self.commodities = {
             'Electronics': ['Smartphones', 'Computers', 'Semiconductors'],
             'Automotive': ['Cars', 'Auto Parts', 'Trucks'],
@@ -28,26 +54,85 @@ class TradeDataGenerator:
             'Market': ['Competition', 'Demand', 'Pricing'],
             'Operational': ['Infrastructure', 'Labor', 'Supply Chain']
         }
+        
+        self.default_years = 3  # Reduced from 5 to 3 years
+        self.scale_factor = None
+        self.codes_per_pair = None  # None: random picks per category (catalogue mode)
+        self.partner_table = None  # None: every reporter trades with every other country
+        if scale_factor is not None:
+            self._apply_scale_factor(scale_factor)
     
-    def generate_trade_data(self, years=3):  # Reduced from 5 to 3 years
-        """Generate realistic trade data for multiple countries and years"""
+    def _apply_scale_factor(self, scale_factor):
+        """Size countries, commodity codes, years and partner sparsity from a profile"""
+        if scale_factor not in SCALE_FACTORS:
+            raise ValueError(
+                f"Unknown scale factor: {scale_factor} (choose from {sorted(SCALE_FACTORS)})"
+            )
+        profile = SCALE_FACTORS[scale_factor]
+        rng = np.random.default_rng(scale_factor)
+        
+        # Real countries first, then synthetic ones with made-up coordinates
+        synthetic = [
+            f"Country {i:03d}" for i in range(len(self.countries) + 1, profile['countries'] + 1)
+        ]
+        self.countries = self.countries[:profile['countries']] + synthetic
+        for country, lat, lon in zip(synthetic,
+                                     rng.uniform(-50, 65, len(synthetic)),
+                                     rng.uniform(-180, 180, len(synthetic))):
+            self.country_coords[country] = {'lat': round(lat, 4), 'lon': round(lon, 4)}
+        
+        # HS-style 6-digit codes spread round-robin over the chapters
+        self.commodities = {}
+        for i in range(profile['commodity_codes']):
+            chapter = HS_CHAPTERS[i % len(HS_CHAPTERS)]
+            k = i // len(HS_CHAPTERS)
+            code = f"{chapter:02d}{k // 9 + 1:02d}{k % 9 + 1}0"
+            self.commodities.setdefault(f"HS{chapter:02d}", []).append(code)
+        
+        # Fixed bilateral matrix: each reporter trades with the same partners every year
+        n_countries = len(self.countries)
+        keys = rng.random((n_countries, n_countries))
+        np.fill_diagonal(keys, np.inf)
+        self.partner_table = np.sort(
+            np.argsort(keys, axis=1)[:, :profile['partners_per_reporter']], axis=1
+        ).astype(np.int32)
+        
+        self.codes_per_pair = profile['codes_per_pair']
+        self.default_years = profile['years']
+        self.scale_factor = scale_factor
+    
+    def expected_row_count(self, years=None):
+        """Exact numpy-engine row count for a scale-factor profile"""
+        if self.codes_per_pair is None:
+            raise ValueError("Row counts are only fixed for scale-factor profiles")
+        return self._pair_count(self._year_list(years)) * self.codes_per_pair
+    
+    def generate_trade_data(self, years=None, engine=None, seed=None):
+        """Generate realistic trade data for multiple countries and years
+        
+        engine='python' builds the rows one dict at a time using the global
+        `random` module. engine='numpy' builds the whole year x reporter x
+        partner x commodity product as arrays from a `numpy.random.Generator`
+        seeded with `seed`, and is the engine to use for large country lists
+        and long year ranges. Its string columns are categoricals.
+        
+        The default is 'python', or 'numpy' for a scale-factor profile: only
+        the numpy engine follows the profile's partners and codes per pair.
+        """
+        if years is None:
+            years = self.default_years
+        if engine is None:
+            engine = 'python' if self.scale_factor is None else 'numpy'
+        if engine == 'python' and self.scale_factor is not None:
+            raise ValueError("Scale-factor profiles need engine='numpy'")
+        if engine == 'numpy':
+            return self._generate_trade_data_numpy(self._year_list(years), np.random.default_rng(seed))
+        if engine != 'python':
+            raise ValueError(f"Unknown generation engine: {engine}")
+        
         data = []
         current_year = datetime.now().year
         
-        # Country coordinates (approximate)
-        country_coords = {
-            'USA': {'lat': 37.0902, 'lon': -95.7129},
-            'China': {'lat': 35.8617, 'lon': 104.1954},
-            'Germany': {'lat': 51.1657, 'lon': 10.4515},
-            'Japan': {'lat': 36.2048, 'lon': 138.2529},
-            'UK': {'lat': 55.3781, 'lon': -3.4360},
-            'France': {'lat': 46.2276, 'lon': 2.2137},
-            'India': {'lat': 20.5937, 'lon': 78.9629},
-            'Italy': {'lat': 41.8719, 'lon': 12.5674},
-            'Brazil': {'lat': -14.2350, 'lon': -51.9253},
-            'Canada': {'lat': 56.1304, 'lon': -106.3468}
-        }
-        
         for year in range(current_year - years + 1, current_year + 1):
             for reporter in self.countries:
                 for partner in self.countries:
@@ -78,14 +163,342 @@ class TradeDataGenerator:
                                 'TradeValue': value,
                                 'TradeFlow': random.choice(['Export', 'Import']),
                                 'GrowthRate': growth_rate * 100,
-                                'Reporter_Lat': country_coords[reporter]['lat'],
-                                'Reporter_Lon': country_coords[reporter]['lon'],
-                                'Partner_Lat': country_coords[partner]['lat'],
-                                'Partner_Lon': country_coords[partner]['lon']
+                                'Reporter_Lat': self.country_coords[reporter]['lat'],
+                                'Reporter_Lon': self.country_coords[reporter]['lon'],
+                                'Partner_Lat': self.country_coords[partner]['lat'],
+                                'Partner_Lon': self.country_coords[partner]['lon']
                             })
         
         return pd.DataFrame(data)
     
+    def iter_trade_data_chunks(self, years=None, chunk_rows=1000000, seed=None):
+        """Yield the numpy-engine dataset as DataFrames of `chunk_rows` rows
+        
+        Reporter/partner pairs are generated block by block, so peak memory is
+        bounded by the chunk size instead of the size of the whole dataset.
+        The last chunk may be shorter.
+        """
+        year_list = self._year_list(years)
+        rng = np.random.default_rng(seed)
+        n_pairs = self._pair_count(year_list)
+        # A pair yields at most one row per catalogue item
+        max_rows_per_pair = self.codes_per_pair or len(self._commodity_labels())
+        pairs_per_block = max(1, chunk_rows // max_rows_per_pair)
+        
+        buffer, buffered = [], 0
+        for start in range(0, n_pairs, pairs_per_block):
+            block = self._generate_trade_data_numpy(
+                year_list, rng, np.arange(start, min(start + pairs_per_block, n_pairs))
+            )
+            buffer.append(block)
+            buffered += len(block)
+            while buffered >= chunk_rows:
+                frame = pd.concat(buffer, ignore_index=True)
+                yield frame.iloc[:chunk_rows]
+                buffer = [frame.iloc[chunk_rows:].reset_index(drop=True)]
+                buffered = len(buffer[0])
+        if buffered:
+            yield pd.concat(buffer, ignore_index=True)
+    
+    def write_trade_data_chunks(self, output_dir, years=None, chunk_rows=1000000, seed=None,
+                                file_format='csv', progress=None):
+        """Stream the numpy-engine dataset to one file per chunk in `output_dir`
+        
+        Files are named part-00000.csv (or .parquet) and so on. `progress`, if
+        given, is called with the running stats after every chunk. Returns a
+        dict with the rows and files written, elapsed seconds and rows/sec.
+        """
+        if file_format not in ('csv', 'parquet'):
+            raise ValueError(f"Unsupported file format: {file_format}")
+        os.makedirs(output_dir, exist_ok=True)
+        
+        stats = {'rows': 0, 'files': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+        start_time = time.perf_counter()
+        for part, chunk in enumerate(self.iter_trade_data_chunks(years, chunk_rows, seed)):
+            path = os.path.join(output_dir, f"part-{part:05d}.{file_format}")
+            if file_format == 'csv':
+                chunk.to_csv(path, index=False)
+            else:
+                chunk.to_parquet(path, index=False)
+            
+            stats['rows'] += len(chunk)
+            stats['files'] += 1
+            stats['seconds'] = time.perf_counter() - start_time
+            stats['rows_per_sec'] = stats['rows'] / stats['seconds'] if stats['seconds'] else 0.0
+            if progress is not None:
+                progress(dict(stats))
+        return stats
+    
+    def generate_trade_data_sharded(self, years=None, seed=0, shard_by='year', n_workers=-1,
+                                    end_year=None):
+        """Generate the numpy-engine dataset in shards across a process pool
+        
+        Work is split into one shard per year or per reporter. Every shard
+        draws from its own seed spawned from `seed` via `SeedSequence`, and
+        shards are concatenated in a fixed order, so the result is identical
+        for any `n_workers`. Pass `end_year` to pin the year range as well.
+        """
+        year_list = self._year_list(years, end_year)
+        n_countries = len(self.countries)
+        n_partners = self._partner_slots().shape[1]
+        pairs_per_year = n_countries * n_partners
+        
+        if shard_by == 'year':
+            shards = [
+                np.arange(y * pairs_per_year, (y + 1) * pairs_per_year)
+                for y in range(len(year_list))
+            ]
+        elif shard_by == 'reporter':
+            shards = [
+                (np.arange(len(year_list))[:, None] * pairs_per_year
+                 + r * n_partners + np.arange(n_partners)).ravel()
+                for r in range(n_countries)
+            ]
+        else:
+            raise ValueError(f"Cannot shard by: {shard_by}")
+        
+        # Imported here so callers that never shard do not load numba and joblib
+        from parallel_utils import ParallelProcessor
+        
+        seeds = np.random.SeedSequence(seed).spawn(len(shards))
+        tasks = [(self, year_list, pair_numbers, shard_seed)
+                 for pair_numbers, shard_seed in zip(shards, seeds)]
+        frames = ParallelProcessor(n_jobs=n_workers).parallel_map(
+            _generate_shard, tasks, use_tqdm=False
+        )
+        return pd.concat(frames, ignore_index=True)
+    
+    def _year_list(self, years=None, end_year=None):
+        """The `years` most recent years, ending with `end_year` (default: this year)"""
+        if years is None:
+            years = self.default_years
+        if end_year is None:
+            end_year = datetime.now().year
+        return np.arange(end_year - years + 1, end_year + 1)
+    
+    def _pair_count(self, year_list):
+        """Number of (year, reporter, partner) combinations that trade"""
+        return len(year_list) * self._partner_slots().size
+    
+    def _partner_slots(self):
+        """Partner country index for every (reporter, partner slot)"""
+        if self.partner_table is not None:
+            return self.partner_table
+        n_countries = len(self.countries)
+        slots = np.arange(n_countries - 1, dtype=np.int32)
+        return slots + (slots >= np.arange(n_countries, dtype=np.int32)[:, None])
+    
+    def generate_star_schema(self, years=None, seed=None):
+        """Generate the numpy-engine dataset as a compact fact table plus dimensions
+        
+        The fact table holds integer-coded country, commodity and flow keys
+        instead of repeated labels and per-row coordinates. Returns a dict
+        with 'facts', 'countries' (with Lat/Lon), 'commodities' and 'flows';
+        `denormalize_star_schema` rebuilds the wide frame. The same seed
+        gives the same data as generate_trade_data(engine='numpy').
+        """
+        if years is None:
+            years = self.default_years
+        codes = self._generate_trade_codes(self._year_list(years), np.random.default_rng(seed))
+        labels = self._commodity_labels()
+        missing = {'lat': np.nan, 'lon': np.nan}
+        
+        facts = pd.DataFrame({
+            'Year': codes['year'].astype(np.int16),
+            'ReporterId': codes['reporter'].astype(_key_dtype(len(self.countries))),
+            'PartnerId': codes['partner'].astype(_key_dtype(len(self.countries))),
+            'CommodityId': codes['commodity'].astype(_key_dtype(len(labels))),
+            'FlowId': codes['flow'],
+            'TradeValue': codes['value'],
+            'GrowthRate': codes['growth']
+        }, copy=False)
+        countries = pd.DataFrame({
+            'CountryId': np.arange(len(self.countries)),
+            'Country': self.countries,
+            'Lat': [self.country_coords.get(c, missing)['lat'] for c in self.countries],
+            'Lon': [self.country_coords.get(c, missing)['lon'] for c in self.countries]
+        })
+        commodities = pd.DataFrame({
+            'CommodityId': np.arange(len(labels)),
+            'Commodity': labels,
+            'Category': [category for category, items in self.commodities.items() for _ in items],
+            'Item': [item for items in self.commodities.values() for item in items]
+        })
+        flows = pd.DataFrame({'FlowId': np.arange(len(TRADE_FLOWS)), 'TradeFlow': TRADE_FLOWS})
+        return {'facts': facts, 'countries': countries, 'commodities': commodities, 'flows': flows}
+    
+    def _generate_trade_data_numpy(self, year_list, rng, pair_numbers=None):
+        """Vectorized trade data generation, as the wide frame of the python engine"""
+        codes = self._generate_trade_codes(year_list, rng, pair_numbers)
+        missing = {'lat': np.nan, 'lon': np.nan}
+        lat = np.array([self.country_coords.get(c, missing)['lat'] for c in self.countries])
+        lon = np.array([self.country_coords.get(c, missing)['lon'] for c in self.countries])
+        reporters = codes['reporter']
+        partners = codes['partner']
+        
+        # The columns are freshly built arrays, so skip pandas' defensive copy
+        return pd.DataFrame({
+            'Year': codes['year'],
+            'Reporter': pd.Categorical.from_codes(reporters, self.countries),
+            'Partner': pd.Categorical.from_codes(partners, self.countries),
+            'Commodity': pd.Categorical.from_codes(codes['commodity'], self._commodity_labels()),
+            'TradeValue': codes['value'],
+            'TradeFlow': pd.Categorical.from_codes(codes['flow'], TRADE_FLOWS),
+            'GrowthRate': codes['growth'],
+            'Reporter_Lat': lat[reporters],
+            'Reporter_Lon': lon[reporters],
+            'Partner_Lat': lat[partners],
+            'Partner_Lon': lon[partners]
+        }, copy=False)
+    
+    def _generate_trade_codes(self, year_list, rng, pair_numbers=None):
+        """Generate the dataset as integer-coded column arrays
+        
+        Pairs are numbered year-major, then reporter, then partner;
+        `pair_numbers` restricts generation to a subset of them.
+        """
+        current_year = year_list[-1]
+        partner_slots = self._partner_slots()
+        if pair_numbers is None:
+            pair_numbers = np.arange(self._pair_count(year_list))
+        
+        # Decode pair numbers into (year, reporter, partner)
+        year_idx, pair_in_year = np.divmod(pair_numbers, partner_slots.size)
+        reporter_idx, partner_slot = np.divmod(pair_in_year, partner_slots.shape[1])
+        reporter_idx = reporter_idx.astype(np.int32)
+        partner_idx = partner_slots[reporter_idx, partner_slot]
+        pair_years = np.asarray(year_list)[year_idx]
+        n_pairs = len(pair_years)
+        
+        # Same value model as the python engine, one draw per pair
+        base_value = rng.uniform(1000000, 100000000, n_pairs)
+        growth_rate = rng.uniform(-0.1, 0.2, n_pairs)
+        seasonality = np.sin(2 * np.pi * (pair_years - current_year) / 4) * 0.1
+        trade_value = base_value * (1 + growth_rate + seasonality)
+        trade_value *= 1 + rng.uniform(-0.05, 0.05, n_pairs)
+        
+        pair_ids, item_ids, values = self._allocate_values_batched(trade_value, rng)
+        
+        return {
+            'year': pair_years[pair_ids],
+            'reporter': reporter_idx[pair_ids],
+            'partner': partner_idx[pair_ids],
+            'commodity': item_ids,
+            'value': values,
+            'flow': rng.integers(0, len(TRADE_FLOWS), len(pair_ids), dtype=np.int8),
+            'growth': growth_rate[pair_ids] * 100
+        }
+    
+    def _commodity_labels(self):
+        """Flat list of "Category - Item" labels in catalogue order"""
+        return [
+            f"{category} - {item}"
+            for category, items in self.commodities.items()
+            for item in items
+        ]
+    
+    def allocate_commodity_values(self, total_values, seed=None):
+        """Split many pair totals across commodities in one batched pass
+        
+        Batch counterpart of `_generate_commodity_data`: returns a long
+        frame with one row per (pair, commodity) holding the pair's position
+        in `total_values`, the commodity label and its allocated value.
+        """
+        pair_ids, item_ids, values = self._allocate_values_batched(
+            np.asarray(total_values, dtype=float), np.random.default_rng(seed)
+        )
+        return pd.DataFrame({
+            'Pair': pair_ids,
+            'Commodity': pd.Categorical.from_codes(item_ids, self._commodity_labels()),
+            'TradeValue': values
+        }, copy=False)
+    
+    def _allocate_values_batched(self, total_values, rng, max_block_cells=1 << 22):
+        """Run the allocation kernel over blocks of pairs
+        
+        The kernels work on (pairs x catalogue positions) matrices; blocking
+        keeps those temporaries to about `max_block_cells` cells so memory
+        stays flat and cost grows linearly with the number of pairs.
+        """
+        if self.codes_per_pair is None:
+            kernel, width = self._allocate_commodity_values_numpy, len(self._commodity_labels())
+        else:
+            kernel, width = self._allocate_profile_codes, self.codes_per_pair
+        block_pairs = max(1, max_block_cells // width)
+        if len(total_values) <= block_pairs:
+            return kernel(total_values, rng)
+        
+        blocks = []
+        for start in range(0, len(total_values), block_pairs):
+            pair_ids, item_ids, values = kernel(total_values[start:start + block_pairs], rng)
+            blocks.append((pair_ids + start, item_ids, values))
+        return tuple(np.concatenate(parts) for parts in zip(*blocks))
+    
+    def _allocate_commodity_values_numpy(self, total_values, rng):
+        """Split each total across commodities, vectorized over all pairs
+        
+        Mirrors `_generate_commodity_data`: categories are visited in order, a
+        random subset of each category's items is picked in random order and
+        every picked item takes 10-30% of the remaining value. Returns
+        (pair index, commodity label index, value) arrays ordered by pair.
+        """
+        total_values = np.asarray(total_values, dtype=float)
+        n_pairs = len(total_values)
+        sizes = np.array([len(items) for items in self.commodities.values()])
+        category_start = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+        position_category = np.repeat(np.arange(len(sizes)), sizes)
+        position_rank = (np.arange(sizes.sum()) - category_start[position_category]).astype(np.int16)
+        
+        # Item visited at each (pair, position): categories in catalogue order,
+        # items within a category in a random order
+        order = np.concatenate([
+            (start + self._random_orders(rng, n_pairs, size)).astype(np.int32)
+            for start, size in zip(category_start, sizes)
+        ], axis=1)
+        n_selected = rng.integers(1, sizes + 1, size=(n_pairs, len(sizes)), dtype=np.int16)
+        picked = position_rank < n_selected[:, position_category]
+        
+        # Each picked item takes its portion of what the earlier items left over
+        portion = np.where(picked, rng.uniform(0.1, 0.3, picked.shape), 0.0)
+        left_over = np.ones(picked.shape)
+        np.cumprod(1 - portion[:, :-1], axis=1, out=left_over[:, 1:])
+        values = total_values[:, None] * left_over * portion
+        
+        flat = np.flatnonzero(picked)
+        pair_ids = np.repeat(np.arange(n_pairs, dtype=np.int32), picked.sum(axis=1))
+        return pair_ids, order.ravel()[flat], values.ravel()[flat]
+    
+    def _allocate_profile_codes(self, total_values, rng):
+        """Split each total across exactly `codes_per_pair` distinct commodity codes
+        
+        Same 10-30% of remaining rule as the catalogue mode, applied to the
+        pair's codes in a random order.
+        """
+        total_values = np.asarray(total_values, dtype=float)
+        n_pairs = len(total_values)
+        k = self.codes_per_pair
+        n_codes = len(self._commodity_labels())
+        
+        # k sorted draws from n-k+1 values, spread by 0..k-1, are k distinct codes
+        codes = np.sort(rng.integers(0, n_codes - k + 1, size=(n_pairs, k), dtype=np.int32), axis=1)
+        codes += np.arange(k, dtype=np.int32)
+        
+        portion = rng.uniform(0.1, 0.3, (n_pairs, k))
+        left_over = np.ones((n_pairs, k))
+        np.cumprod(1 - portion[:, :-1], axis=1, out=left_over[:, 1:])
+        values = rng.permuted(total_values[:, None] * left_over * portion, axis=1)
+        
+        return np.repeat(np.arange(n_pairs, dtype=np.int32), k), codes.ravel(), values.ravel()
+    
+    @staticmethod
+    def _random_orders(rng, n_rows, n_items):
+        """One random permutation of range(n_items) per row"""
+        if n_items <= 5:
+            # Small categories: pick from the table of all permutations
+            table = np.array(list(permutations(range(n_items))), dtype=np.int32)
+            return table[rng.integers(0, len(table), n_rows)]
+        return np.argsort(rng.random((n_rows, n_items)), axis=1).astype(np.int32)
+    
     def _generate_commodity_data(self, total_value):
         """Generate commodity-specific trade data"""
         commodities = {}
@@ -210,4 +623,45 @@ class TradeDataGenerator:
         2. {random.choice(['Currency volatility', 'Trade barriers', 'Competition'])}
         3. {random.choice(['Infrastructure limitations', 'Supply chain issues', 'Labor market challenges'])}
         4. {random.choice(['Cultural differences', 'Market entry barriers', 'Local competition'])}
-        """ 
\ No newline at end of file
+        """ 
+
+def _generate_shard(task):
+    """Build one shard of `generate_trade_data_sharded` (runs in a worker process)"""
+    generator, year_list, pair_numbers, seed_sequence = task
+    return generator._generate_trade_data_numpy(
+        year_list, np.random.default_rng(seed_sequence), pair_numbers
+    )
+
+def _key_dtype(n_values):
+    """Smallest signed integer dtype that can hold keys 0..n_values-1"""
+    return np.min_scalar_type(-max(n_values, 1))
+
+def denormalize_star_schema(star):
+    """Rebuild the wide trade frame from `generate_star_schema` output"""
+    facts = star['facts']
+    countries = star['countries']['Country'].tolist()
+    wide = pd.DataFrame({
+        'Year': facts['Year'].astype(np.int64),
+        'Reporter': pd.Categorical.from_codes(facts['ReporterId'], countries),
+        'Partner': pd.Categorical.from_codes(facts['PartnerId'], countries),
+        'Commodity': pd.Categorical.from_codes(
+            facts['CommodityId'], star['commodities']['Commodity'].tolist()
+        ),
+        'TradeValue': facts['TradeValue'],
+        'TradeFlow': pd.Categorical.from_codes(facts['FlowId'], star['flows']['TradeFlow'].tolist()),
+        'GrowthRate': facts['GrowthRate']
+    })
+    return attach_country_coordinates(wide, star['countries'])
+
+def star_schema_memory_report(star, denormalized=None):
+    """Compare the memory of the star schema with the equivalent wide frame"""
+    if denormalized is None:
+        denormalized = denormalize_star_schema(star)
+    normalized_bytes = int(sum(table.memory_usage(deep=True).sum() for table in star.values()))
+    denormalized_bytes = int(denormalized.memory_usage(deep=True).sum())
+    return {
+        'normalized_bytes': normalized_bytes,
+        'denormalized_bytes': denormalized_bytes,
+        'saved_bytes': denormalized_bytes - normalized_bytes,
+        'saved_pct': 100 * (1 - normalized_bytes / denormalized_bytes) if denormalized_bytes else 0.0
+    }
@@ -2,29 +2,42 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from data_generator import TradeDataGenerator
+from snapshot_store import SnapshotStore
 import json
 import os
 import streamlit as st
 
 class TradeData:
-    def __init__(self):
+    def __init__(self, sample_data_dir='sample_data'):
         self.generator = TradeDataGenerator()
-        self.sample_data_dir = 'sample_data'
+        self.sample_data_dir = sample_data_dir
         os.makedirs(self.sample_data_dir, exist_ok=True)
+        self.snapshot_store = SnapshotStore(self.sample_data_dir)
         
         # Load sample data if it exists
         self.trade_data = self._load_data()
         self.market_insights = self._load_insights()
         self.sample_reports = self._load_reports()
     
-    def _load_data(self):
-        """Load trade data from CSV file"""
-        # Always generate fresh data
+    def _load_data(self, refresh=False):
+        """Load trade data from the snapshot, generating it only when missing or on refresh"""
+        if not refresh and self.snapshot_store.exists():
+            try:
+                return self.snapshot_store.load()
+            except Exception as e:
+                print(f"Error loading snapshot, regenerating: {str(e)}")
+        
         data = self.generator.generate_trade_data(years=3)
         file_path = os.path.join(self.sample_data_dir, 'trade_data.csv')
         data.to_csv(file_path, index=False)
+        self.snapshot_store.save(data)
         return data
     
+    def refresh_data(self):
+        """Regenerate the trade data and replace the snapshot"""
+        self.trade_data = self._load_data(refresh=True)
+        return self.trade_data
+    
     def _load_insights(self):
         """Load market insights from JSON file"""
         file_path = os.path.join(self.sample_data_dir, 'market_insights.json')
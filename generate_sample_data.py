@@ -1,7 +1,8 @@
-from data_generator import TradeDataGenerator
+from data_generator import TradeDataGenerator, SCALE_FACTORS
 import pandas as pd
 import json
 import os
+import argparse
 
 def generate_and_save_data():
     # Create output directory if it doesn't exist
@@ -40,5 +41,42 @@ def generate_and_save_data():
     print("\nSample data generation complete!")
     print(f"Files saved in '{output_dir}' directory:")
 
+def generate_large_dataset(output_dir, years=None, chunk_rows=1000000, file_format='csv', seed=None,
+                           scale_factor=None):
+    """Stream a large trade dataset to partitioned files without holding it in memory"""
+    generator = TradeDataGenerator(scale_factor=scale_factor)
+    if scale_factor is not None:
+        print(f"Scale factor {scale_factor}: {generator.expected_row_count(years):,} rows expected")
+    
+    def report(stats):
+        print(f"  {stats['rows']:,} rows in {stats['files']} files "
+              f"({stats['rows_per_sec']:,.0f} rows/sec)")
+    
+    print(f"Streaming trade data to '{output_dir}' in chunks of {chunk_rows:,} rows...")
+    stats = generator.write_trade_data_chunks(
+        output_dir, years=years, chunk_rows=chunk_rows, seed=seed,
+        file_format=file_format, progress=report
+    )
+    print(f"\nGenerated {stats['rows']:,} trade records in {stats['seconds']:.1f}s "
+          f"({stats['rows_per_sec']:,.0f} rows/sec)")
+    return stats
+
 if __name__ == "__main__":
-    generate_and_save_data() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Generate sample trade data")
+    parser.add_argument('--chunk-rows', type=int,
+                        help="stream the trade data to partitioned files of this many rows")
+    parser.add_argument('--years', type=int,
+                        help="number of years (default: 5, or the scale factor's years)")
+    parser.add_argument('--scale-factor', type=int, choices=sorted(SCALE_FACTORS),
+                        help="size the workload from a benchmark profile")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv')
+    parser.add_argument('--output-dir', default=os.path.join('sample_data', 'trade_data_parts'))
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    
+    if args.chunk_rows:
+        years = args.years or (None if args.scale_factor else 5)
+        generate_large_dataset(args.output_dir, years, args.chunk_rows, args.format, args.seed,
+                               args.scale_factor)
+    else:
+        generate_and_save_data() 
\ No newline at end of file
@@ -0,0 +1,177 @@
+import copy
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional
+
+# Approximate annual GDP (current USD, rounded World Bank figures) and country centroids
+BUNDLED_INDICATORS = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  'reference_data', 'country_indicators.csv')
+EARTH_RADIUS_KM = 6371.0
+
+def load_country_indicators(path: str = BUNDLED_INDICATORS) -> pd.DataFrame:
+    """Load the offline Country/Lat/Lon/Year/GDP table"""
+    return pd.read_csv(path)
+
+def haversine_matrix(lat: np.ndarray, lon: np.ndarray) -> np.ndarray:
+    """Great-circle distances in km between every pair of points"""
+    lat = np.radians(np.asarray(lat, dtype=float))
+    lon = np.radians(np.asarray(lon, dtype=float))
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class GravityModel:
+    """Gravity model of bilateral trade: ln T_ij = b0 + b1 ln GDP_i + b2 ln GDP_j + b3 ln D_ij
+
+    GDP comes from the bundled indicator table (years outside it use the
+    nearest year available) and distances from a haversine matrix computed
+    once over its coordinates. `fit` estimates the coefficients over every
+    pair and year in a single solve, either by log-linear OLS or by PPML,
+    which also uses zero flows.
+    """
+
+    def __init__(self, indicators: Optional[pd.DataFrame] = None):
+        indicators = load_country_indicators() if indicators is None else indicators
+        self.indicators = indicators
+        self.gdp = indicators.pivot_table(index='Country', columns='Year', values='GDP')
+        coords = indicators.groupby('Country')[['Lat', 'Lon']].first().reindex(self.gdp.index)
+        self.countries = self.gdp.index
+        self.distances = pd.DataFrame(
+            haversine_matrix(coords['Lat'].to_numpy(), coords['Lon'].to_numpy()),
+            index=self.countries, columns=self.countries
+        )
+        self.coefficients: Optional[Dict[str, float]] = None
+        self.method = None
+        self.n_obs = 0
+        self._panel = None
+
+    def unfitted(self) -> 'GravityModel':
+        """New unfitted model sharing this one's GDP table and distance matrix"""
+        model = copy.copy(self)
+        model.coefficients = None
+        model.method = None
+        model.n_obs = 0
+        model._panel = None
+        return model
+
+    def get_gdp(self, country: str, year: Optional[int] = None) -> float:
+        """GDP of `country` in `year` (latest year if None); NaN if unknown"""
+        if country not in self.countries:
+            return np.nan
+        if year is None:
+            year = self.gdp.columns.max()
+        return float(self._gdp_lookup(np.array([self.countries.get_loc(country)]), np.array([year]))[0])
+
+    def get_distance(self, country1: str, country2: str) -> float:
+        """Great-circle distance in km; NaN if either country is unknown"""
+        if country1 not in self.countries or country2 not in self.countries:
+            return np.nan
+        return float(self.distances.at[country1, country2])
+
+    def _gdp_lookup(self, country_idx: np.ndarray, years: np.ndarray) -> np.ndarray:
+        table_years = self.gdp.columns.to_numpy()
+        year_idx = np.clip(np.searchsorted(table_years, years), 0, len(table_years) - 1)
+        # searchsorted picks the next year up; step back where the previous one is nearer
+        previous = np.maximum(year_idx - 1, 0)
+        nearer = np.abs(table_years[previous] - years) < np.abs(table_years[year_idx] - years)
+        year_idx = np.where(nearer, previous, year_idx)
+        return self.gdp.to_numpy()[country_idx, year_idx]
+
+    def _design(self, years, exporters, importers):
+        """Regressor matrix for pairs given as positions in `countries`"""
+        return np.column_stack([
+            np.ones(len(years)),
+            np.log(self._gdp_lookup(exporters, years)),
+            np.log(self._gdp_lookup(importers, years)),
+            np.log(self.distances.to_numpy()[exporters, importers])
+        ])
+
+    def _pair_panel(self, data: pd.DataFrame, flow: Optional[str]) -> pd.DataFrame:
+        """Trade per (Year, Exporter, Importer) for every pair of known countries, zeros included"""
+        if flow is not None and 'TradeFlow' in data.columns:
+            data = data[data['TradeFlow'] == flow]
+        trade = data.groupby(['Year', 'Reporter', 'Partner'], observed=True)['TradeValue'].sum()
+        years = np.sort(data['Year'].unique())
+        countries = self.countries[self.countries.isin(data['Reporter'].unique()) |
+                                   self.countries.isin(data['Partner'].unique())]
+        positions = self.countries.get_indexer(countries)
+        n = len(countries)
+        exporter, importer = np.divmod(np.arange(n * n), n)
+        off_diagonal = exporter != importer
+        exporter, importer = exporter[off_diagonal], importer[off_diagonal]
+        panel = pd.DataFrame({
+            'Year': np.repeat(years, len(exporter)),
+            'Exporter': np.tile(positions[exporter], len(years)),
+            'Importer': np.tile(positions[importer], len(years))
+        })
+        keys = pd.MultiIndex.from_arrays([
+            panel['Year'], self.countries[panel['Exporter']], self.countries[panel['Importer']]
+        ])
+        panel['Trade'] = trade.reindex(keys, fill_value=0.0).to_numpy()
+        return panel
+
+    def fit(self, data: pd.DataFrame, method: str = 'ols', flow: Optional[str] = 'Export',
+            max_iter: int = 50, tol: float = 1e-8) -> 'GravityModel':
+        """Estimate the coefficients from every pair and year in `data`"""
+        if method not in ('ols', 'ppml'):
+            raise ValueError(f"Unknown gravity estimator: {method}")
+        panel = self._pair_panel(data, flow)
+        X = self._design(panel['Year'].to_numpy(), panel['Exporter'].to_numpy(), panel['Importer'].to_numpy())
+        y = panel['Trade'].to_numpy(dtype=float)
+
+        if method == 'ols':
+            positive = y > 0
+            if positive.sum() < X.shape[1]:
+                raise ValueError("Not enough positive flows between known countries to fit the model")
+            beta = np.linalg.lstsq(X[positive], np.log(y[positive]), rcond=None)[0]
+            n_obs = int(positive.sum())
+        else:
+            beta = self._fit_ppml(X, y, max_iter, tol)
+            n_obs = len(y)
+
+        self.coefficients = dict(zip(['const', 'ln_gdp_exporter', 'ln_gdp_importer', 'ln_distance'], beta.tolist()))
+        self.method = method
+        self.n_obs = n_obs
+        self._panel = panel
+        return self
+
+    @staticmethod
+    def _fit_ppml(X, y, max_iter, tol):
+        """Poisson pseudo-maximum likelihood by iteratively reweighted least squares"""
+        scale = y.mean() if y.mean() > 0 else 1.0
+        y = y / scale  # Work in units of the mean flow to keep weights well conditioned
+        beta = np.linalg.lstsq(X, np.log(y + 1.0), rcond=None)[0]
+        for _ in range(max_iter):
+            mu = np.exp(X @ beta)
+            z = X @ beta + (y - mu) / mu
+            sqrt_w = np.sqrt(mu)
+            new_beta = np.linalg.lstsq(X * sqrt_w[:, None], z * sqrt_w, rcond=None)[0]
+            converged = np.max(np.abs(new_beta - beta)) < tol
+            beta = new_beta
+            if converged:
+                break
+        beta[0] += np.log(scale)
+        return beta
+
+    def predict(self) -> pd.DataFrame:
+        """Fitted trade for every pair and year the model was fitted on"""
+        if self.coefficients is None:
+            raise ValueError("Fit the gravity model before predicting")
+        panel = self._panel
+        X = self._design(panel['Year'].to_numpy(), panel['Exporter'].to_numpy(), panel['Importer'].to_numpy())
+        beta = np.array(list(self.coefficients.values()))
+        return pd.DataFrame({
+            'Year': panel['Year'].to_numpy(),
+            'Exporter': self.countries[panel['Exporter']],
+            'Importer': self.countries[panel['Importer']],
+            'Actual': panel['Trade'].to_numpy(),
+            'Predicted': np.exp(X @ beta)
+        })
+
+    def trade_potential(self) -> pd.DataFrame:
+        """Actual over predicted trade, summed across years, for every exporter/importer pair"""
+        totals = self.predict().groupby(['Exporter', 'Importer'])[['Actual', 'Predicted']].sum()
+        ratio = (totals['Actual'] / totals['Predicted']).unstack('Importer')
+        return ratio.rename_axis(index='Exporter', columns='Importer')
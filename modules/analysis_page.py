@@ -6,7 +6,7 @@ def show_analysis():
     st.title("🔍 Trade Analysis")
     
     if 'trade_data_instance' in st.session_state:
-        data = st.session_state.trade_data_instance.get_sample_trade_data()
+        cube = st.session_state.trade_data_instance.get_cube()
         
         # Analysis type selector
         analysis_type = st.selectbox(
@@ -18,8 +18,8 @@ def show_analysis():
             st.subheader("Trade Balance Analysis")
             
             # Calculate trade balance for each country
-            exports = data[data['TradeFlow'] == 'Export'].groupby('Reporter')['TradeValue'].sum()
-            imports = data[data['TradeFlow'] == 'Import'].groupby('Reporter')['TradeValue'].sum()
+            exports = cube.sum(['Reporter'], where={'TradeFlow': 'Export'})
+            imports = cube.sum(['Reporter'], where={'TradeFlow': 'Import'})
             trade_balance = (exports - imports).sort_values(ascending=False)
             
             fig = px.bar(
@@ -34,14 +34,11 @@ def show_analysis():
             st.subheader("Country Analysis")
             
             # Country selector
-            country = st.selectbox("Select Country", sorted(data['Reporter'].unique()))
-            
-            # Filter data for selected country
-            country_data = data[data['Reporter'] == country]
+            country = st.selectbox("Select Country", list(cube.labels['Reporter']))
             
             # Show top trading partners
             st.write(f"Top Trading Partners for {country}")
-            partners = country_data.groupby('Partner')['TradeValue'].sum().sort_values(ascending=False).head(5)
+            partners = cube.sum(['Partner'], where={'Reporter': country}).sort_values(ascending=False).head(5)
             fig = px.bar(
                 x=partners.index,
                 y=partners.values / 1e9,
@@ -54,7 +51,7 @@ def show_analysis():
             st.subheader("Time Series Analysis")
             
             # Calculate yearly trends
-            yearly_data = data.groupby(['Year', 'TradeFlow'])['TradeValue'].sum().reset_index()
+            yearly_data = cube.sum(['Year', 'TradeFlow']).reset_index()
             
             fig = px.line(
                 yearly_data,
@@ -70,7 +67,7 @@ def show_analysis():
             st.subheader("Trade Flow Analysis")
             
             # Calculate trade flow distribution
-            flow_data = data.groupby('TradeFlow')['TradeValue'].agg(['sum', 'count', 'mean']).reset_index()
+            flow_data = cube.aggregate(['TradeFlow'])[['TradeFlow', 'TradeValue', 'Count', 'Mean']]
             flow_data.columns = ['Trade Flow', 'Total Value', 'Number of Transactions', 'Average Value']
             
             # Format values
@@ -0,0 +1,179 @@
+import os
+import threading
+import time
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
+from typing import Any, Callable, Dict, Optional
+
+# Export format -> file extension
+EXPORT_FORMATS = {
+    'csv': '.csv',
+    'csv.gz': '.csv.gz',
+    'csv.zst': '.csv.zst',
+    'parquet': '.parquet',
+    'xlsx': '.xlsx'
+}
+FORMAT_ALIASES = {'excel': 'xlsx', 'gzip': 'csv.gz', 'zstd': 'csv.zst'}
+CSV_CODECS = {'csv.gz': 'gzip', 'csv.zst': 'zstd'}
+EXCEL_MAX_ROWS = 1048576
+
+def normalize_format(file_format: str) -> str:
+    """Map a user-facing format name onto a key of EXPORT_FORMATS"""
+    file_format = FORMAT_ALIASES.get(file_format.lower(), file_format.lower())
+    if file_format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    return file_format
+
+def stream_export(data: pd.DataFrame, path: str, file_format: str = 'csv',
+                  chunk_rows: int = 100000,
+                  progress: Optional[Callable[[float, str], None]] = None) -> Dict[str, Any]:
+    """Write `data` to `path` one row chunk at a time
+
+    Only one chunk is converted at a time, so memory stays bounded by
+    `chunk_rows` whatever the size of the frame. The file is written under a
+    temporary name and moved into place when complete.
+    """
+    file_format = normalize_format(file_format)
+    if file_format == 'xlsx' and len(data) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(data):,} rows exceed the Excel sheet limit; use CSV or Parquet")
+
+    start_time = time.perf_counter()
+    tmp_path = f"{path}.tmp"
+    n_rows = len(data)
+    chunks = ((start, min(start + chunk_rows, n_rows)) for start in range(0, max(n_rows, 1), chunk_rows))
+    try:
+        writer = _open_writer(tmp_path, file_format, data)
+        try:
+            for start, stop in chunks:
+                writer.write(data.iloc[start:stop])
+                if progress is not None:
+                    progress(stop / n_rows if n_rows else 1.0, f"Exported {stop:,} of {n_rows:,} rows")
+        finally:
+            writer.close()
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    seconds = time.perf_counter() - start_time
+    return {
+        'path': path,
+        'rows': n_rows,
+        'bytes': os.path.getsize(path),
+        'seconds': seconds,
+        'rows_per_sec': n_rows / seconds if seconds > 0 else float('inf')
+    }
+
+def _open_writer(path, file_format, data):
+    if file_format == 'parquet':
+        return _ParquetChunkWriter(path, data)
+    if file_format == 'xlsx':
+        return _ExcelChunkWriter(path, data)
+    return _CsvChunkWriter(path, data, CSV_CODECS.get(file_format))
+
+def _arrow_schema(data):
+    return pa.Schema.from_pandas(data.iloc[:0], preserve_index=False)
+
+class _CsvChunkWriter:
+    """CSV through Arrow's writer, optionally inside a compressed stream"""
+
+    def __init__(self, path, data, codec=None):
+        self.schema = _arrow_schema(data)
+        self.sink = pa.CompressedOutputStream(path, codec) if codec else pa.OSFile(path, 'wb')
+        self.writer = pacsv.CSVWriter(self.sink, self.schema)
+
+    def write(self, chunk):
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+        self.sink.close()
+
+class _ParquetChunkWriter:
+    """Parquet with one row group per chunk"""
+
+    def __init__(self, path, data):
+        self.schema = _arrow_schema(data)
+        self.writer = pq.ParquetWriter(path, self.schema, compression='zstd')
+
+    def write(self, chunk):
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.schema, preserve_index=False))
+
+    def close(self):
+        self.writer.close()
+
+class _ExcelChunkWriter:
+    """XLSX in xlsxwriter's constant-memory mode, which flushes each row as written"""
+
+    def __init__(self, path, data):
+        try:
+            import xlsxwriter
+        except ImportError:
+            raise ImportError("Excel export requires the xlsxwriter package")
+        self.workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'nan_inf_to_errors': True})
+        self.sheet = self.workbook.add_worksheet('Trade Data')
+        self.sheet.write_row(0, 0, [str(column) for column in data.columns])
+        self.next_row = 1
+
+    def write(self, chunk):
+        for values in chunk.itertuples(index=False, name=None):
+            self.sheet.write_row(self.next_row, 0, values)
+            self.next_row += 1
+
+    def close(self):
+        self.workbook.close()
+
+class BackgroundExport:
+    """Run one stream_export at a time on a worker thread and track its progress"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._status: Optional[Dict[str, Any]] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, data: pd.DataFrame, path: str, file_format: str = 'csv',
+              chunk_rows: int = 100000) -> bool:
+        """Start exporting `data`; returns False if an export is already running"""
+        with self._lock:
+            if self._status is not None and self._status['running']:
+                return False
+            status = {'running': True, 'progress': 0.0, 'message': 'Starting export',
+                      'path': path, 'stats': None, 'error': None}
+            self._status = status
+            thread = threading.Thread(
+                target=self._run, args=(data, path, file_format, chunk_rows, status),
+                name='trade-export', daemon=True
+            )
+            self._thread = thread
+        thread.start()
+        return True
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """Snapshot of the latest export, or None if none ran"""
+        with self._lock:
+            return dict(self._status) if self._status is not None else None
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until the current export finishes; True if it succeeded"""
+        if self._thread is not None:
+            self._thread.join(timeout)
+        status = self.status()
+        return status is not None and not status['running'] and status['error'] is None
+
+    def _run(self, data, path, file_format, chunk_rows, status):
+        def report(fraction, message):
+            with self._lock:
+                status['progress'] = fraction
+                status['message'] = message
+
+        try:
+            stats = stream_export(data, path, file_format, chunk_rows=chunk_rows, progress=report)
+            with self._lock:
+                status.update(running=False, progress=1.0, stats=stats,
+                              message=f"Exported {stats['rows']:,} rows to {path}")
+        except Exception as e:
+            with self._lock:
+                status.update(running=False, error=str(e), message=f"Export failed: {str(e)}")
@@ -0,0 +1,103 @@
+import threading
+from collections import OrderedDict
+import pandas as pd
+from typing import Any, Dict, Hashable, Optional
+
+def _plain(value):
+    """Convert numpy scalars to Python values so equal filters hash equally"""
+    return value.item() if hasattr(value, 'item') else value
+
+def _canonical_values(values):
+    if values is None:
+        return None
+    if isinstance(values, str):
+        values = [values]
+    values = {_plain(v) for v in values}
+    return tuple(sorted(values, key=lambda v: (type(v).__name__, v))) or None
+
+def canonical_filter_spec(years=None, countries=None, min_trade_value=None, trade_type=None,
+                          reporters=None, max_trade_value=None) -> tuple:
+    """Order-insensitive key for a TradeData.filter_data call
+
+    Filters that select nothing-in-particular ('All', empty lists) map to
+    None, so calls that return the same rows share one key.
+    """
+    if isinstance(trade_type, str) and trade_type.lower() == 'all':
+        trade_type = None
+    return (
+        ('years', _canonical_values(years)),
+        ('countries', _canonical_values(countries)),
+        ('reporters', _canonical_values(reporters)),
+        ('trade_type', _canonical_values(trade_type)),
+        ('min_trade_value', None if min_trade_value is None else float(min_trade_value)),
+        ('max_trade_value', None if max_trade_value is None else float(max_trade_value))
+    )
+
+class FilterResultCache:
+    """LRU cache of filter results bounded by the memory they hold
+
+    Keys combine the dataset version with a canonical filter spec, so a
+    refresh never serves stale rows; entries for old versions simply age out.
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        """Return the cached result for `key`, or None on a miss"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # A shallow copy keeps callers from adding columns to the cached frame
+        return entry[0].copy(deep=False)
+
+    def put(self, key: Hashable, result: pd.DataFrame) -> bool:
+        """Cache `result`, evicting least recently used entries to stay in budget"""
+        size = int(result.memory_usage(index=True, deep=True).sum())
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self.current_bytes -= previous[1]
+            while self._entries and self.current_bytes + size > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.current_bytes -= evicted_size
+                self.evictions += 1
+            self._entries[key] = (result, size)
+            self.current_bytes += size
+        return True
+
+    def clear(self):
+        """Drop every entry and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and memory use"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+# Global instance
+filter_cache = FilterResultCache()
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional, Tuple
+
+INDEXED_COLUMNS = ('Year', 'Reporter', 'Partner', 'TradeFlow')
+
+class ColumnIndex:
+    """Row ids of one column grouped by value
+
+    Values are dictionary-encoded once. A predicate then becomes either a
+    scatter of the matching row ids (selective filters) or a lookup-table
+    gather over the codes (broad filters), instead of a scan of the values.
+    """
+
+    def __init__(self, values: pd.Series):
+        codes, uniques = pd.factorize(values, sort=True)
+        self.n_rows = len(codes)
+        self.codes = codes.astype(np.min_scalar_type(max(len(uniques) - 1, 0)))
+        self.lookup = {value: i for i, value in enumerate(uniques.tolist())}
+        counts = np.bincount(codes, minlength=len(uniques))
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+        self.row_ids = np.argsort(codes, kind='stable').astype(np.int64)
+
+    def mask(self, values: Iterable) -> np.ndarray:
+        """Boolean row mask for rows whose value is in `values`"""
+        selected = np.array([self.lookup[v] for v in values if v in self.lookup], dtype=np.int64)
+        n_matches = int((self.offsets[selected + 1] - self.offsets[selected]).sum())
+        if n_matches * 8 < self.n_rows:
+            mask = np.zeros(self.n_rows, dtype=bool)
+            for code in selected:
+                mask[self.row_ids[self.offsets[code]:self.offsets[code + 1]]] = True
+            return mask
+        table = np.zeros(len(self.lookup), dtype=bool)
+        table[selected] = True
+        return table[self.codes]
+
+class SortedValueIndex:
+    """Row ids of a numeric column in ascending value order
+
+    Threshold and range queries locate their cut points with `searchsorted`
+    in O(log n) and read the matching row ids as one contiguous slice.
+    """
+
+    def __init__(self, values: pd.Series):
+        values = values.to_numpy()
+        self.order = np.argsort(values, kind='stable')
+        self.sorted_values = values[self.order]
+        # argsort places NaNs last; they never satisfy a range predicate
+        self.n_valid = int(np.count_nonzero(~np.isnan(self.sorted_values)))
+
+    def __len__(self):
+        return len(self.order)
+
+    def bounds(self, low=None, high=None) -> Tuple[int, int]:
+        """Slice of `order` holding values with low <= value <= high"""
+        start = 0 if low is None else int(np.searchsorted(self.sorted_values, low, side='left'))
+        stop = self.n_valid if high is None else int(np.searchsorted(self.sorted_values[:self.n_valid], high, side='right'))
+        return start, max(start, stop)
+
+    def rows(self, low=None, high=None) -> np.ndarray:
+        """Row ids with low <= value <= high, in value order"""
+        start, stop = self.bounds(low, high)
+        return self.order[start:stop]
+
+    def count(self, low=None, high=None) -> int:
+        start, stop = self.bounds(low, high)
+        return stop - start
+
+    def value_range(self) -> Tuple[float, float]:
+        """Smallest and largest value, or NaNs for an empty column"""
+        if self.n_valid == 0:
+            return float('nan'), float('nan')
+        return float(self.sorted_values[0]), float(self.sorted_values[self.n_valid - 1])
+
+    def mask(self, low=None, high=None) -> np.ndarray:
+        """Boolean row mask for low <= value <= high"""
+        start, stop = self.bounds(low, high)
+        n_rows = len(self)
+        # Write whichever side of the cut points touches fewer rows
+        if stop - start <= n_rows - (stop - start):
+            mask = np.zeros(n_rows, dtype=bool)
+            mask[self.order[start:stop]] = True
+        else:
+            mask = np.ones(n_rows, dtype=bool)
+            mask[self.order[:start]] = False
+            mask[self.order[stop:]] = False
+        return mask
+
+class FilterIndex:
+    """Prebuilt indexes answering TradeData.filter_data with row selections"""
+
+    def __init__(self, data: pd.DataFrame, columns=INDEXED_COLUMNS):
+        self.n_rows = len(data)
+        self.columns = {column: ColumnIndex(data[column]) for column in columns}
+        self.trade_value = SortedValueIndex(data['TradeValue'])
+
+    def select(self, years=None, countries=None, min_trade_value=None,
+               trade_type=None, reporters=None, max_trade_value=None) -> Optional[np.ndarray]:
+        """Positions of the matching rows, or None when no filter applies
+
+        `countries` matches either side of a flow, `reporters` only the
+        reporting side. `trade_type` is a single flow ('All' disables it) or
+        a list of flows.
+        """
+        mask = None
+
+        def combine(current, new):
+            return new if current is None else np.logical_and(current, new, out=current)
+
+        if years:
+            mask = combine(mask, self.columns['Year'].mask(years))
+        if countries:
+            country_mask = self.columns['Reporter'].mask(countries)
+            country_mask |= self.columns['Partner'].mask(countries)
+            mask = combine(mask, country_mask)
+        if reporters:
+            mask = combine(mask, self.columns['Reporter'].mask(reporters))
+        if min_trade_value is not None or max_trade_value is not None:
+            mask = combine(mask, self.trade_value.mask(min_trade_value, max_trade_value))
+        if isinstance(trade_type, str):
+            trade_type = None if trade_type.lower() == 'all' else [trade_type]
+        if trade_type:
+            mask = combine(mask, self.columns['TradeFlow'].mask(trade_type))
+
+        return None if mask is None else np.flatnonzero(mask)
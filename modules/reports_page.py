@@ -7,6 +7,7 @@ def show_reports():
     
     if 'trade_data_instance' in st.session_state:
         data = st.session_state.trade_data_instance.get_sample_trade_data()
+        cube = st.session_state.trade_data_instance.get_cube()
         
         # Report type selector
         report_type = st.selectbox(
@@ -22,7 +23,7 @@ def show_reports():
             
             with col1:
                 st.write("Trade Value Statistics (USD)")
-                total_value = data['TradeValue'].sum()
+                total_value = cube.total()
                 stats = data['TradeValue'].describe()
                 stats_df = pd.DataFrame({
                     'Metric': ['Total', 'Mean', 'Std Dev', 'Min', 'Max'],
@@ -38,7 +39,7 @@ def show_reports():
             
             with col2:
                 st.write("Trade Flow Distribution")
-                flow_dist = data['TradeFlow'].value_counts()
+                flow_dist = cube.aggregate(['TradeFlow']).set_index('TradeFlow')['Count']
                 fig = px.pie(values=flow_dist.values, names=flow_dist.index)
                 st.plotly_chart(fig)
             
@@ -46,15 +47,12 @@ def show_reports():
             st.subheader("Country Profile Report")
             
             # Country selector
-            country = st.selectbox("Select Country", sorted(data['Reporter'].unique()))
-            
-            # Filter data for selected country
-            country_data = data[data['Reporter'] == country]
+            country = st.selectbox("Select Country", list(cube.labels['Reporter']))
             
             # Trade statistics
-            total_trade = country_data['TradeValue'].sum()
-            exports = country_data[country_data['TradeFlow'] == 'Export']['TradeValue'].sum()
-            imports = country_data[country_data['TradeFlow'] == 'Import']['TradeValue'].sum()
+            total_trade = cube.total(where={'Reporter': country})
+            exports = cube.total(where={'Reporter': country, 'TradeFlow': 'Export'})
+            imports = cube.total(where={'Reporter': country, 'TradeFlow': 'Import'})
             
             col1, col2, col3 = st.columns(3)
             col1.metric("Total Trade", f"${total_trade/1e9:.2f}B")
@@ -63,7 +61,7 @@ def show_reports():
             
             # Trade partners
             st.write("Top Trading Partners")
-            partners = country_data.groupby('Partner')['TradeValue'].sum().sort_values(ascending=False).head(10)
+            partners = cube.sum(['Partner'], where={'Reporter': country}).sort_values(ascending=False).head(10)
             fig = px.bar(x=partners.index, y=partners.values/1e9,
                         labels={'x': 'Partner', 'y': 'Trade Value (Billion USD)'})
             st.plotly_chart(fig)
@@ -72,24 +70,24 @@ def show_reports():
             st.subheader("Trade Flow Report")
             
             # Time period selector
-            years = sorted(data['Year'].unique())
+            years = list(cube.labels['Year'])
             start_year = st.selectbox("Start Year", years, index=0)
             end_year = st.selectbox("End Year", years, index=len(years)-1)
             
-            # Filter data for selected period
-            period_data = data[(data['Year'] >= start_year) & (data['Year'] <= end_year)]
+            # Restrict the cube to the selected period
+            period = [year for year in years if start_year <= year <= end_year]
             
             # Trade flow trends
-            flow_trends = period_data.groupby(['Year', 'TradeFlow'])['TradeValue'].sum().reset_index()
+            flow_trends = cube.sum(['Year', 'TradeFlow'], where={'Year': period}).reset_index()
             fig = px.line(flow_trends, x='Year', y='TradeValue', color='TradeFlow',
                          title='Trade Flows Over Time')
             st.plotly_chart(fig)
             
             # Trade flow summary table
             st.write("Trade Flow Summary")
-            flow_summary = period_data.groupby('TradeFlow').agg({
-                'TradeValue': ['sum', 'mean', 'count']
-            }).round(2)
+            flow_summary = cube.aggregate(['TradeFlow'], where={'Year': period}).set_index('TradeFlow')[
+                ['TradeValue', 'Mean', 'Count']
+            ].round(2)
             flow_summary.columns = ['Total Value', 'Average Value', 'Number of Transactions']
             st.dataframe(flow_summary)
             
@@ -125,13 +123,16 @@ def show_reports():
                     step=1000000.0
                 )
             
-            # Filter data based on selections
-            filtered_data = data[
-                (data['Year'].isin(selected_years)) &
-                (data['TradeFlow'].isin(selected_flows)) &
-                (data['Reporter'].isin(selected_countries)) &
-                (data['TradeValue'] >= min_value)
-            ]
+            # Filter data based on selections; an empty selection matches nothing
+            if selected_years and selected_flows and selected_countries:
+                filtered_data = st.session_state.trade_data_instance.filter_data(
+                    years=selected_years,
+                    trade_type=selected_flows,
+                    reporters=selected_countries,
+                    min_trade_value=min_value
+                )
+            else:
+                filtered_data = data.iloc[0:0]
             
             # Show filtered data
             st.write(f"Filtered Data ({len(filtered_data)} records)")
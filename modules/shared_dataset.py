@@ -0,0 +1,180 @@
+import threading
+import weakref
+import numpy as np
+import pandas as pd
+from typing import Any, Callable, Dict, Optional
+
+class _DatasetVersion:
+    """One published version of a dataset and the number of readers holding it"""
+
+    def __init__(self, version: int, data: pd.DataFrame, derived: Optional[Dict[str, Any]] = None):
+        self.version = version
+        self.data = data
+        self.derived = derived or {}
+        self.readers = 0
+
+class DatasetLease:
+    """A session's hold on one version of a shared dataset
+
+    `data` is a shallow, read-only view: it shares the column buffers of the
+    published frame, and adding columns to it does not affect other sessions.
+    The lease is released explicitly or when it is garbage collected.
+    """
+
+    def __init__(self, registry: 'SharedDatasetRegistry', name: str, entry: _DatasetVersion):
+        self.name = name
+        self.version = entry.version
+        self.data = entry.data.copy(deep=False)
+        self.derived = entry.derived
+        self._finalizer = weakref.finalize(self, registry._release, name, entry)
+
+    def release(self):
+        """Give the version back to the registry"""
+        self._finalizer()
+
+    @property
+    def released(self) -> bool:
+        return not self._finalizer.alive
+
+class SharedDatasetRegistry:
+    """Process-wide store handing every session a view of one copy of each dataset
+
+    Datasets are published under a name with an increasing version number.
+    Publishing a new version does not disturb sessions still reading the old
+    one; a superseded version is dropped once its last lease is released.
+    Derived aggregates are published together with the data they came from.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._current: Dict[str, _DatasetVersion] = {}
+        self._retired: Dict[str, Dict[int, _DatasetVersion]] = {}
+        self._versions: Dict[str, int] = {}
+        self._refreshes: Dict[str, Dict[str, Any]] = {}
+        self._refresh_threads: Dict[str, threading.Thread] = {}
+
+    def publish(self, name: str, data: pd.DataFrame,
+                derived: Optional[Dict[str, Any]] = None) -> int:
+        """Make `data` the current version of `name` and return its version number"""
+        frozen = _freeze(data)
+        frozen_derived = {
+            key: _freeze(value) if isinstance(value, pd.DataFrame) else value
+            for key, value in (derived or {}).items()
+        }
+        with self._lock:
+            version = self._versions.get(name, 0) + 1
+            self._versions[name] = version
+            previous = self._current.get(name)
+            self._current[name] = _DatasetVersion(version, frozen, frozen_derived)
+            if previous is not None and previous.readers > 0:
+                self._retired.setdefault(name, {})[previous.version] = previous
+            return version
+
+    def acquire(self, name: str, loader: Optional[Callable[[], pd.DataFrame]] = None,
+                derive: Optional[Callable[[pd.DataFrame], Dict[str, Any]]] = None) -> DatasetLease:
+        """Lease the current version of `name`, building it with `loader` on first use"""
+        with self._lock:
+            if name not in self._current:
+                if loader is None:
+                    raise KeyError(f"No dataset published under '{name}'")
+                data = loader()
+                self.publish(name, data, derive(data) if derive is not None else None)
+            entry = self._current[name]
+            entry.readers += 1
+            return DatasetLease(self, name, entry)
+
+    def refresh_in_background(self, name: str,
+                              builder: Callable[[Callable[[float, str], None]], pd.DataFrame],
+                              derive: Optional[Callable[[pd.DataFrame], Dict[str, Any]]] = None) -> bool:
+        """Rebuild `name` on a worker thread and publish it when complete
+
+        `builder` receives a `progress(fraction, message)` callback. Readers
+        keep the current version until the new data and its derived
+        aggregates are published together. Returns False if a refresh of
+        `name` is already running.
+        """
+        with self._lock:
+            status = self._refreshes.get(name)
+            if status is not None and status['running']:
+                return False
+            status = {'running': True, 'progress': 0.0, 'message': 'Starting refresh',
+                      'version': None, 'error': None}
+            self._refreshes[name] = status
+            thread = threading.Thread(
+                target=self._run_refresh, args=(name, builder, derive, status),
+                name=f"refresh-{name}", daemon=True
+            )
+            self._refresh_threads[name] = thread
+        thread.start()
+        return True
+
+    def refresh_status(self, name: str) -> Optional[Dict[str, Any]]:
+        """Snapshot of the latest background refresh of `name`, or None if none ran"""
+        with self._lock:
+            status = self._refreshes.get(name)
+            return dict(status) if status is not None else None
+
+    def wait_for_refresh(self, name: str, timeout: Optional[float] = None) -> bool:
+        """Block until the background refresh of `name` finishes"""
+        thread = self._refresh_threads.get(name)
+        if thread is not None:
+            thread.join(timeout)
+        status = self.refresh_status(name)
+        return status is not None and not status['running'] and status['error'] is None
+
+    def _run_refresh(self, name, builder, derive, status):
+        def report(fraction, message):
+            with self._lock:
+                status['progress'] = min(max(fraction, 0.0), 1.0)
+                status['message'] = message
+
+        try:
+            # Building takes most of the time; keep the last 20% for aggregates and the swap
+            data = builder(lambda fraction, message: report(0.8 * fraction, message))
+            report(0.8, 'Building aggregates')
+            derived = derive(data) if derive is not None else None
+            report(0.95, 'Publishing')
+            version = self.publish(name, data, derived)
+            with self._lock:
+                status.update(running=False, progress=1.0, version=version,
+                              message=f"Refreshed to version {version}")
+        except Exception as e:
+            with self._lock:
+                status.update(running=False, error=str(e), message=f"Refresh failed: {e}")
+
+    def current_version(self, name: str) -> Optional[int]:
+        """Version number of the current dataset, or None if nothing is published"""
+        with self._lock:
+            entry = self._current.get(name)
+            return entry.version if entry is not None else None
+
+    def stats(self, name: str) -> Dict[int, int]:
+        """Readers per live version of `name`"""
+        with self._lock:
+            live = dict(self._retired.get(name, {}))
+            if name in self._current:
+                live[self._current[name].version] = self._current[name]
+            return {version: entry.readers for version, entry in sorted(live.items())}
+
+    def _release(self, name: str, entry: _DatasetVersion):
+        with self._lock:
+            entry.readers -= 1
+            retired = self._retired.get(name, {})
+            if entry.readers <= 0 and entry.version in retired:
+                del retired[entry.version]
+
+def _freeze(data: pd.DataFrame) -> pd.DataFrame:
+    """Copy `data` into column buffers that cannot be written in place"""
+    columns = {}
+    for column in data.columns:
+        values = data[column]
+        if isinstance(values.dtype, np.dtype):
+            values = values.to_numpy(copy=True)
+            values.flags.writeable = False
+        else:
+            values = values.copy()
+        columns[column] = values
+    return pd.DataFrame(columns, index=data.index.copy(), copy=False)
+
+# Global instance
+registry = SharedDatasetRegistry()
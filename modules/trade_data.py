@@ -1,92 +1,249 @@
 import pandas as pd
 import numpy as np
+import pyarrow as pa
 from datetime import datetime
 import os
+import itertools
+from modules.filter_index import FilterIndex
+from trade_cube import TradeCube
+from modules.filter_cache import canonical_filter_spec
+from modules.export_pipeline import EXPORT_FORMATS, BackgroundExport, normalize_format, stream_export
+
+# Distinguishes locally built datasets in cache keys
+_local_versions = itertools.count(1)
+
+SAMPLE_COUNTRIES = ['USA', 'China', 'Germany', 'Japan', 'UK', 'France', 'India', 'Brazil', 'Canada', 'Australia']
+
+def _take_labels(labels, codes):
+    """Expand integer codes into a string column without per-row Python objects"""
+    return pd.Series(pa.array(labels).take(pa.array(codes)), dtype='str')
 
 class TradeData:
-    def __init__(self):
+    def __init__(self, registry=None, dataset_name='trade_data', n_countries=10, n_years=13, cache=None):
+        """Hold trade data for one session
+        
+        With a `SharedDatasetRegistry` the session leases a read-only view of
+        the process-wide dataset instead of building its own copy.
+        `n_countries` and `n_years` size the generated sample data, and an
+        optional `FilterResultCache` memoizes filter_data results.
+        """
         self.data = None
-        self.load_sample_data()
+        self.cache = cache
+        self._export = BackgroundExport()
+        self._local_version = None
+        self.n_countries = n_countries
+        self.n_years = n_years
+        self.registry = registry
+        self.dataset_name = dataset_name
+        self._lease = None
+        self._derived = None
+        if registry is None:
+            self.load_sample_data()
+        else:
+            self._acquire_shared_data()
     
-    def load_sample_data(self):
+    def load_sample_data(self, n_countries=None, n_years=None):
         """Load sample trade data"""
-        # Create sample data
-        np.random.seed(42)
-        years = range(2010, 2023)
-        countries = ['USA', 'China', 'Germany', 'Japan', 'UK', 'France', 'India', 'Brazil', 'Canada', 'Australia']
+        self.data = self._build_sample_data(n_countries=n_countries, n_years=n_years)
+        if n_countries is not None:
+            self.n_countries = n_countries
+        if n_years is not None:
+            self.n_years = n_years
+        self._derived = None
+        self._local_version = next(_local_versions)
+    
+    def _build_sample_data(self, progress=None, n_countries=None, n_years=None):
+        """Build the sample trade data frame, reporting `progress(fraction, message)`"""
+        n_countries = self.n_countries if n_countries is None else n_countries
+        n_years = self.n_years if n_years is None else n_years
+        if n_countries < 2 or n_years < 1:
+            raise ValueError("Sample data needs at least 2 countries and 1 year")
+        if progress is not None:
+            progress(0.0, f"Building {n_countries} countries x {n_years} years")
         
-        data = []
-        for year in years:
-            for reporter in countries:
-                for partner in countries:
-                    if reporter != partner:
-                        trade_value = np.random.uniform(1e6, 1e9)
-                        trade_flow = np.random.choice(['Import', 'Export'])
-                        data.append({
-                            'Year': year,
-                            'Reporter': reporter,
-                            'Partner': partner,
-                            'TradeValue': trade_value,
-                            'TradeFlow': trade_flow
-                        })
+        # A local generator keeps worker-thread builds independent of the global seed
+        rng = np.random.default_rng(42)
+        years = np.arange(2010, 2010 + n_years, dtype=np.int64)
+        countries = SAMPLE_COUNTRIES[:n_countries] + [
+            f"Country {i:03d}" for i in range(len(SAMPLE_COUNTRIES) + 1, n_countries + 1)
+        ]
         
-        self.data = pd.DataFrame(data)
+        # Every ordered (reporter, partner) pair without self-trade, repeated per year
+        pairs_per_year = n_countries * (n_countries - 1)
+        reporter = np.repeat(np.arange(n_countries), n_countries - 1)
+        slot = np.tile(np.arange(n_countries - 1), n_countries)
+        partner = slot + (slot >= reporter)
+        n_rows = pairs_per_year * n_years
+        
+        if progress is not None:
+            progress(0.5, f"Assembling {n_rows:,} rows")
+        return pd.DataFrame({
+            'Year': np.repeat(years, pairs_per_year),
+            'Reporter': _take_labels(countries, np.tile(reporter, n_years)),
+            'Partner': _take_labels(countries, np.tile(partner, n_years)),
+            'TradeValue': rng.uniform(1e6, 1e9, n_rows),
+            'TradeFlow': _take_labels(['Import', 'Export'], rng.integers(0, 2, n_rows))
+        })
+    
+    @staticmethod
+    def _build_derived(data):
+        """Build the aggregate cube, summary tables and filter index the pages read"""
+        # Roll-ups behind the dashboard, analysis, report and visualization charts
+        cube = TradeCube(data).prepare(
+            ('Reporter', 'Partner', 'TradeFlow'), ('Year', 'Reporter', 'TradeFlow'),
+            ('Year', 'TradeFlow'), ('Reporter', 'TradeFlow'), ('Partner',), ('Year', 'Reporter')
+        )
+        return {
+            'by_year': cube.sum(['Year', 'TradeFlow']).reset_index(),
+            'by_reporter': cube.sum(['Reporter', 'TradeFlow']).reset_index(),
+            'cube': cube,
+            'filter_index': FilterIndex(data)
+        }
+    
+    def _get_derived(self):
+        """Return the derived structures for the data this session reads"""
+        data = self.get_sample_trade_data()
+        if self._lease is not None and self._lease.derived:
+            return self._lease.derived
+        # Standalone data, or a version published without derived results
+        if self._derived is None and data is not None:
+            self._derived = self._build_derived(data)
+        return self._derived
+    
+    def get_cube(self):
+        """Return the aggregate cube for the data this session reads"""
+        derived = self._get_derived()
+        return derived['cube'] if derived else None
+    
+    def get_aggregates(self):
+        """Return the derived aggregate tables for the data this session reads"""
+        derived = self._get_derived() or {}
+        return {name: value for name, value in derived.items() if isinstance(value, pd.DataFrame)}
+    
+    def _acquire_shared_data(self):
+        """Lease the registry's current dataset, replacing any older lease"""
+        lease = self.registry.acquire(
+            self.dataset_name, loader=self._build_sample_data, derive=self._build_derived
+        )
+        if self._lease is not None:
+            self._lease.release()
+        self._lease = lease
+        self.data = lease.data
+        self._derived = None
+    
+    @property
+    def data_version(self):
+        """Version of the shared dataset this session reads (None without a registry)"""
+        return self._lease.version if self._lease is not None else None
     
     def get_sample_trade_data(self):
         """Return the sample trade data"""
+        if self._lease is not None and self.registry.current_version(self.dataset_name) != self._lease.version:
+            # A refresh published new data; pick it up at this read boundary
+            self._acquire_shared_data()
         return self.data
     
     def refresh_data(self):
         """Refresh the trade data"""
         try:
-            self.load_sample_data()
+            if self.registry is not None:
+                data = self._build_sample_data()
+                self.registry.publish(self.dataset_name, data, self._build_derived(data))
+                self._acquire_shared_data()
+            else:
+                self.load_sample_data()
             return True
         except Exception as e:
             print(f"Error refreshing data: {str(e)}")
             return False
     
-    def export_data(self, format='csv'):
-        """Export the trade data in the specified format"""
+    def start_background_refresh(self):
+        """Rebuild the shared dataset on a worker thread while reads use the current version"""
+        if self.registry is None:
+            return False, "Background refresh needs a shared dataset registry"
+        started = self.registry.refresh_in_background(
+            self.dataset_name, self._build_sample_data, derive=self._build_derived
+        )
+        if started:
+            return True, "Refresh started"
+        return False, "A refresh is already running"
+    
+    def refresh_status(self):
+        """Return the progress of the latest background refresh, or None"""
+        if self.registry is None:
+            return None
+        return self.registry.refresh_status(self.dataset_name)
+    
+    def _export_path(self, format, output_dir):
+        """Timestamped export file name for `format`"""
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        extension = EXPORT_FORMATS[normalize_format(format)]
+        return os.path.join(output_dir, f"trade_data_{timestamp}{extension}")
+    
+    def export_data(self, format='csv', filters=None, output_dir='.'):
+        """Export the trade data (or the view selected by `filters`) in the specified format"""
         if self.data is None:
             return False, "No data available to export"
         
         try:
-            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            filename = f"trade_data_{timestamp}"
-            
-            if format.lower() == 'csv':
-                export_path = f"{filename}.csv"
-                self.data.to_csv(export_path, index=False)
-                return True, f"Data exported successfully to {export_path}"
-            elif format.lower() == 'excel':
-                export_path = f"{filename}.xlsx"
-                self.data.to_excel(export_path, index=False)
-                return True, f"Data exported successfully to {export_path}"
-            else:
-                return False, f"Unsupported export format: {format}"
+            export_path = self._export_path(format, output_dir)
+            view = self.filter_data(**(filters or {}))
+            stream_export(view, export_path, format)
+            return True, f"Data exported successfully to {export_path}"
+        except ValueError as e:
+            return False, str(e)
         except Exception as e:
             return False, f"Export failed: {str(e)}"
     
-    def filter_data(self, years=None, countries=None, min_trade_value=None, trade_type=None):
+    def start_export(self, format='csv', filters=None, output_dir='.'):
+        """Export the filtered view on a worker thread; poll export_status for progress"""
+        if self.data is None:
+            return False, "No data available to export"
+        
+        try:
+            export_path = self._export_path(format, output_dir)
+            view = self.filter_data(**(filters or {}))
+        except ValueError as e:
+            return False, str(e)
+        if not self._export.start(view, export_path, format):
+            return False, "An export is already running"
+        return True, f"Exporting {len(view):,} rows to {export_path}"
+    
+    def export_status(self):
+        """Return the progress of the latest background export, or None"""
+        return self._export.status()
+    
+    def get_trade_value_range(self):
+        """Return the smallest and largest TradeValue without scanning the data"""
+        if self.data is None:
+            return None
+        return self._get_derived()['filter_index'].trade_value.value_range()
+    
+    def filter_data(self, years=None, countries=None, min_trade_value=None, trade_type=None,
+                    reporters=None, max_trade_value=None):
         """Filter the trade data based on specified criteria"""
         if self.data is None:
             return None
         
-        filtered_data = self.data.copy()
-        
-        if years:
-            filtered_data = filtered_data[filtered_data['Year'].isin(years)]
-        
-        if countries:
-            filtered_data = filtered_data[
-                (filtered_data['Reporter'].isin(countries)) |
-                (filtered_data['Partner'].isin(countries))
-            ]
-        
-        if min_trade_value is not None:
-            filtered_data = filtered_data[filtered_data['TradeValue'] >= min_trade_value]
-            
-        if trade_type and trade_type.lower() != 'all':
-            filtered_data = filtered_data[filtered_data['TradeFlow'] == trade_type]
+        filters = dict(years=years, countries=countries, min_trade_value=min_trade_value,
+                       trade_type=trade_type, reporters=reporters, max_trade_value=max_trade_value)
+        # Resolving the derived structures first also moves the session to the latest version
+        filter_index = self._get_derived()['filter_index']
+        cache_key = None
+        if self.cache is not None:
+            version = self.data_version if self._lease is not None else ('local', self._local_version)
+            cache_key = (self.dataset_name, version, canonical_filter_spec(**filters))
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                return cached
         
-        return filtered_data 
\ No newline at end of file
+        # Predicates combine on prebuilt indexes; only the final selection is materialized
+        rows = filter_index.select(**filters)
+        if rows is None:
+            return self.data.copy(deep=False)
+        result = self.data.take(rows)
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+            # Like FilterResultCache.get, hand out a shallow copy so callers cannot alter the entry
+            return result.copy(deep=False)
+        return result 
\ No newline at end of file
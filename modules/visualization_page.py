@@ -8,6 +8,7 @@ def show_visualization():
     
     # Load sample data
     data = st.session_state.trade_data_instance.get_sample_trade_data()
+    cube = st.session_state.trade_data_instance.get_cube()
     
     # Visualization type selection
     viz_type = st.selectbox(
@@ -17,7 +18,7 @@ def show_visualization():
     
     if viz_type == "Time Series":
         st.subheader("Time Series Analysis")
-        time_data = data.groupby('Year')['TradeValue'].sum().reset_index()
+        time_data = cube.sum(['Year']).reset_index()
         fig = px.line(time_data, x='Year', y='TradeValue', title='Trade Value Over Time')
         st.plotly_chart(fig)
         
@@ -27,19 +28,19 @@ def show_visualization():
         
     elif viz_type == "Bar Chart":
         st.subheader("Bar Chart Analysis")
-        top_countries = data.groupby('Reporter')['TradeValue'].sum().nlargest(10).reset_index()
+        top_countries = cube.sum(['Reporter']).nlargest(10).reset_index()
         fig = px.bar(top_countries, x='Reporter', y='TradeValue', title='Top 10 Trading Partners')
         st.plotly_chart(fig)
         
     elif viz_type == "Pie Chart":
         st.subheader("Pie Chart Analysis")
-        country_share = data.groupby('Reporter')['TradeValue'].sum().nlargest(5)
+        country_share = cube.sum(['Reporter']).nlargest(5)
         fig = px.pie(values=country_share.values, names=country_share.index, title='Top 5 Countries by Trade Share')
         st.plotly_chart(fig)
         
     else:  # Heatmap
         st.subheader("Heatmap Analysis")
-        pivot_data = data.pivot_table(values='TradeValue', index='Year', columns='Reporter', aggfunc='sum')
+        pivot_data = cube.sum(['Year', 'Reporter']).unstack('Reporter')
         fig = px.imshow(pivot_data, title='Trade Value Heatmap')
         st.plotly_chart(fig)
     
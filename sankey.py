@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from typing import Dict, Optional, Sequence
+
+OTHER_LABEL = 'Other'
+
+def commodity_categories(commodities: pd.Series) -> pd.Categorical:
+    """Category part of 'Category - Item' labels ('HSnn' for HS-coded labels), resolved once per distinct label"""
+    codes, uniques = pd.factorize(commodities)
+    category_codes, categories = pd.factorize(pd.Index([str(label).split(' - ')[0] for label in uniques]))
+    lookup = np.append(category_codes, -1)  # position -1 keeps missing commodities missing
+    return pd.Categorical.from_codes(lookup[codes], categories)
+
+def build_sankey(data: pd.DataFrame, levels: Sequence[str], value: str = 'TradeValue',
+                 top_k: Optional[int] = 10, other_label: str = OTHER_LABEL) -> Dict[str, pd.DataFrame]:
+    """Nodes and links of a multi-level Sankey, e.g. Reporter -> Category -> Partner
+
+    Each level's labels are integer-coded once. Nodes beyond the `top_k`
+    largest by value at their level are merged into one `other_label` node
+    per level, and each pair of adjacent levels is summed in a single
+    bincount over combined codes. Returns {'nodes': Level/Label/Value,
+    'links': Source/Target/Value} with positional node ids.
+    """
+    levels = list(levels)
+    if len(levels) < 2:
+        raise ValueError("A Sankey diagram needs at least two levels")
+    values = data[value].to_numpy(dtype=float)
+    level_codes = [pd.factorize(data[level]) for level in levels]
+    valid = np.logical_and.reduce([codes >= 0 for codes, _ in level_codes]) & ~np.isnan(values)
+    values = values[valid]
+
+    node_frames, pruned_codes, offset = [], [], 0
+    for level, (codes, labels) in zip(levels, level_codes):
+        codes = codes[valid]
+        totals = np.bincount(codes, weights=values, minlength=len(labels))
+        order = np.argsort(-totals, kind='stable')
+        keep = order[:top_k] if top_k is not None else order
+        keep = keep[totals[keep] > 0]
+        remap = np.full(len(labels), len(keep))
+        remap[keep] = np.arange(len(keep))
+        node_labels = list(np.asarray(labels, dtype=object)[keep])
+        node_values = list(totals[keep])
+        if len(keep) < np.count_nonzero(totals):
+            node_labels.append(other_label)
+            node_values.append(totals.sum() - totals[keep].sum())
+        node_frames.append(pd.DataFrame({'Level': level, 'Label': node_labels, 'Value': node_values},
+                                        index=np.arange(offset, offset + len(node_labels))))
+        pruned_codes.append((remap[codes], offset, len(node_labels)))
+        offset += len(node_labels)
+
+    link_frames = []
+    for (source, source_offset, n_sources), (target, target_offset, n_targets) in zip(pruned_codes, pruned_codes[1:]):
+        sums = np.bincount(source * n_targets + target, weights=values, minlength=n_sources * n_targets)
+        pairs = np.flatnonzero(sums)
+        link_frames.append(pd.DataFrame({
+            'Source': source_offset + pairs // n_targets,
+            'Target': target_offset + pairs % n_targets,
+            'Value': sums[pairs]
+        }))
+    return {'nodes': pd.concat(node_frames), 'links': pd.concat(link_frames, ignore_index=True)}
+
+def create_sankey_figure(sankey: Dict[str, pd.DataFrame], title: str) -> go.Figure:
+    """Plotly figure for the output of build_sankey"""
+    nodes, links = sankey['nodes'], sankey['links']
+    fig = go.Figure(data=[go.Sankey(
+        node=dict(
+            pad=15,
+            thickness=20,
+            line=dict(color="black", width=0.5),
+            label=nodes['Label'].tolist(),
+            color="blue"
+        ),
+        link=dict(
+            source=links['Source'].tolist(),
+            target=links['Target'].tolist(),
+            value=links['Value'].tolist()
+        )
+    )])
+    fig.update_layout(title_text=title)
+    return fig
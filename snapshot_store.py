@@ -0,0 +1,84 @@
+import os
+import pyarrow as pa
+import pyarrow.feather as feather
+import pandas as pd
+from typing import List, Optional
+
+class SnapshotStore:
+    """Persist a trade dataset once as an uncompressed Feather (Arrow IPC) file
+
+    Uncompressed Arrow files can be memory-mapped, so loading a snapshot
+    only pages in the columns that are actually touched. Each save writes a
+    new versioned file instead of replacing a file that may still be
+    mapped (Windows refuses to replace or delete a mapped file); older
+    versions are removed once nothing maps them any more.
+    """
+
+    def __init__(self, directory: str = 'sample_data', name: str = 'trade_data'):
+        self.directory = directory
+        self.name = name
+
+    def _versions(self) -> List[int]:
+        """Version numbers of the snapshot files on disk, oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        prefix, suffix = f"{self.name}.", '.feather'
+        versions = []
+        for filename in os.listdir(self.directory):
+            version = filename[len(prefix):-len(suffix)]
+            if filename.startswith(prefix) and filename.endswith(suffix) and version.isdigit():
+                versions.append(int(version))
+        return sorted(versions)
+
+    def _path(self, version: int) -> str:
+        return os.path.join(self.directory, f"{self.name}.{version}.feather")
+
+    @property
+    def path(self) -> Optional[str]:
+        """File of the latest snapshot, or None if none was written"""
+        versions = self._versions()
+        return self._path(versions[-1]) if versions else None
+
+    def exists(self) -> bool:
+        """Check whether a snapshot has been written"""
+        return bool(self._versions())
+
+    def save(self, data: pd.DataFrame) -> str:
+        """Write the snapshot as a new version and prune the versions before it"""
+        os.makedirs(self.directory, exist_ok=True)
+        versions = self._versions()
+        path = self._path(versions[-1] + 1 if versions else 1)
+        tmp_path = f"{path}.tmp"
+        table = pa.Table.from_pandas(data, preserve_index=False)
+        feather.write_feather(table, tmp_path, compression='uncompressed')
+        os.replace(tmp_path, path)
+        self._remove(versions)
+        return path
+
+    def _remove(self, versions: List[int]) -> bool:
+        """Delete snapshot versions, skipping files still memory-mapped by a reader"""
+        removed = True
+        for version in versions:
+            try:
+                os.remove(self._path(version))
+            except PermissionError:
+                # Still mapped (Windows); a later save or clear retries
+                removed = False
+        return removed
+
+    def load(self) -> pd.DataFrame:
+        """Load the latest snapshot through a memory map"""
+        path = self.path
+        if path is None:
+            raise FileNotFoundError(f"No snapshot of '{self.name}' in {self.directory}")
+        table = feather.read_table(path, memory_map=True)
+        # split_blocks lets numeric columns stay views over the mapped buffers
+        return table.to_pandas(split_blocks=True)
+
+    def clear(self) -> bool:
+        """Delete the snapshot, forcing the next load to regenerate"""
+        versions = self._versions()
+        if versions:
+            self._remove(versions)
+            return True
+        return False
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+from commodity_hierarchy import CommodityHierarchy
+from data_generator import TradeDataGenerator
+from trade_analysis import AdvancedTradeAnalysis
+from trade_cube import TradeCube
+
+def test_legacy_names_and_hs_labels_resolve_to_every_level():
+    hierarchy = CommodityHierarchy(['Energy - Crude Oil', 'HS85 - 851710', 'HS97', 'Unknown - Item'])
+    def node(level, commodity):
+        code = hierarchy.codes[level][hierarchy.commodities.get_loc(commodity)]
+        return hierarchy.nodes[level][code] if code >= 0 else None
+    assert [node(level, 'Energy - Crude Oil') for level in ('section', 'chapter', 'heading', 'sitc1', 'sitc3')] \
+        == ['V', '27', '2709', '3', '333']
+    assert [node(level, 'HS85 - 851710') for level in ('section', 'chapter', 'subheading', 'sitc1')] \
+        == ['XVI', '85', '851710', None]
+    assert node('section', 'HS97') == 'XXI' and node('heading', 'HS97') is None
+    assert all(node(level, 'Unknown - Item') is None for level in hierarchy.codes)
+    assert list(hierarchy.members('sitc1', '3')) == ['Energy - Crude Oil']
+
+def test_rollup_matches_string_prefix_groupby():
+    data = TradeDataGenerator(scale_factor=1).generate_trade_data(years=1, engine='numpy', seed=2)
+    cube = TradeCube(data)
+    hierarchy = CommodityHierarchy(cube.labels['Commodity'])
+    result = hierarchy.rollup(cube, 'heading', by=['Reporter'], where={'TradeFlow': 'Export'})
+    exports = data[data['TradeFlow'] == 'Export']
+    heading = exports['Commodity'].astype(str).str.extract(r'(\d{6})')[0].str[:4]
+    expected = exports.groupby([exports['Reporter'].astype(str), heading])['TradeValue'].sum()
+    np.testing.assert_allclose(result.set_index(['Reporter', 'heading'])['TradeValue'].sort_index().to_numpy(),
+                               expected.sort_index().to_numpy())
+
+def test_value_chain_uses_sitc_sections():
+    data = TradeDataGenerator().generate_trade_data(years=2, engine='numpy', seed=5)
+    result = AdvancedTradeAnalysis().analyze_value_chain(data, 'Cars')
+    raw = data[data['Commodity'].str.split(' - ').str[0].isin(['Agriculture', 'Energy'])]['TradeValue']
+    assert result.at[0, 'raw_materials'] == pytest.approx(raw.sum())
+    assert result.at[1, 'raw_materials'] == pytest.approx(raw.mean())
+    assert result.at[2, 'raw_materials'] == pytest.approx(raw.std())
+
+def test_value_chain_reads_bare_sitc_codes():
+    hierarchy = CommodityHierarchy(['0412', '333', '5411', '851710'])
+    assert list(hierarchy.sitc_codes[:3]) == ['0412', '333', '5411']
+    assert hierarchy.codes['sitc1'][3] == -1 and hierarchy.codes['chapter'][3] >= 0
+
+    data = TradeDataGenerator(scale_factor=1).generate_trade_data(years=1, engine='numpy', seed=3).head(4)
+    data = data.assign(Commodity=['0412', '333', '5411', '851710'], TradeValue=[1.0, 3.0, 4.0, 8.0])
+    result = AdvancedTradeAnalysis().analyze_value_chain(data, 'Cars')
+    assert list(result.index) == [0, 1, 2]
+    assert list(result['raw_materials']) == pytest.approx([4.0, 2.0, np.sqrt(2.0)])
+    assert list(result['intermediate'][:2]) == pytest.approx([4.0, 4.0])
+    assert np.isnan(result.at[2, 'intermediate'])  # a single row has no sample std
+    assert result.at[0, 'final'] == 0 and result[['final']].iloc[1:].isna().all().all()
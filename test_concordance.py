@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from concordance import Concordance
+from data_generator import TradeDataGenerator
+from trade_analysis import AdvancedTradeAnalysis
+
+@pytest.fixture(scope='module')
+def concordance():
+    return Concordance(pd.DataFrame({
+        'HS': ['85', '85', '851712', '27'],
+        'SITC': ['77', '76', '76432', '33'],
+        'Weight': [3.0, 1.0, 1.0, 1.0]
+    }))
+
+def test_convert_splits_rows_by_weight(concordance):
+    data = pd.DataFrame({
+        'Commodity': ['HS85 - 854231', 'HS85 - 851712', 'HS27 - 270900', 'Services', None],
+        'TradeValue': [100.0, 50.0, 20.0, 7.0, 1.0],
+        'Year': [2020, 2020, 2021, 2021, 2021]
+    })
+    result = concordance.convert(data, 'SITC')
+    assert result['TradeValue'].sum() == pytest.approx(data['TradeValue'].sum())
+    assert list(zip(result['Commodity'][:5], result['TradeValue'][:5])) == [
+        ('SITC 76', 25.0), ('SITC 77', 75.0), ('SITC 76432', 50.0), ('SITC 33', 20.0), ('Services', 7.0)
+    ]
+    assert pd.isna(result['Commodity'].iloc[5]) and result['TradeValue'].iloc[5] == 1.0
+    assert list(result['Year']) == [2020, 2020, 2020, 2021, 2021, 2021]
+
+def test_reverse_direction_uses_normalised_weights(concordance):
+    mapping = concordance.mapping('HS')
+    assert mapping.groupby('Source')['Weight'].sum().tolist() == pytest.approx([1.0] * mapping['Source'].nunique())
+    result = concordance.convert(pd.DataFrame({'Commodity': ['SITC 76432'], 'TradeValue': [10.0]}), 'HS')
+    assert list(result['Commodity']) == ['HS85 - 851712']
+    with pytest.raises(ValueError):
+        concordance.convert(pd.DataFrame({'Commodity': ['HS85'], 'TradeValue': [1.0]}), 'CPC')
+
+def test_convert_matches_merge_reference():
+    data = TradeDataGenerator(scale_factor=1).generate_trade_data(years=1, engine='numpy', seed=4)
+    concordance = Concordance()
+    result = concordance.convert(data, 'SITC')
+    mapping = concordance.mapping('SITC')
+    code = data['Commodity'].astype(str).str[-6:]
+    source = code.where(code.isin(mapping['Source']), code.str[:2])
+    merged = pd.DataFrame({'Source': source, 'TradeValue': data['TradeValue']}).merge(mapping, on='Source')
+    merged['Commodity'] = 'SITC ' + merged['Target']
+    expected = (merged['TradeValue'] * merged['Weight']).groupby(merged['Commodity']).sum()
+    actual = result.groupby('Commodity', observed=True)['TradeValue'].sum()
+    assert list(actual.index) == list(expected.index)
+    np.testing.assert_allclose(actual.to_numpy(), expected.to_numpy())
+    assert len(result) == len(merged)
+
+def test_analyses_run_on_converted_data():
+    data = TradeDataGenerator().generate_trade_data(years=1, engine='numpy', seed=5)
+    analysis = AdvancedTradeAnalysis()
+    sitc = analysis.convert_classification(data, 'sitc')
+    assert sitc is analysis.convert_classification(data, 'SITC')
+    rca = analysis.calculate_rca_matrix(sitc)
+    assert 'SITC 33300' in rca.columns
+    chain = analysis.analyze_value_chain(sitc, 'Crude Oil')
+    pd.testing.assert_frame_equal(chain, analysis.analyze_value_chain(data, 'Crude Oil'))
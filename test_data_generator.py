@@ -0,0 +1,146 @@
+import subprocess
+import sys
+import pytest
+import numpy as np
+import pandas as pd
+from country_coordinates import attach_country_coordinates
+from data_generator import (
+    TradeDataGenerator, SCALE_FACTORS, denormalize_star_schema, star_schema_memory_report
+)
+from visualization import TradeVisualization
+
+@pytest.fixture
+def generator():
+    return TradeDataGenerator()
+
+def test_numpy_engine_matches_python_schema(generator):
+    python_df = generator.generate_trade_data(years=1, engine='python')
+    numpy_df = generator.generate_trade_data(years=1, engine='numpy', seed=0)
+    assert list(numpy_df.columns) == list(python_df.columns)
+    assert set(numpy_df['Commodity'].unique()) <= set(generator._commodity_labels())
+    assert (numpy_df['Reporter'] != numpy_df['Partner']).all()
+    assert numpy_df['TradeValue'].gt(0).all()
+
+def test_numpy_engine_is_reproducible(generator):
+    first = generator.generate_trade_data(years=2, engine='numpy', seed=42)
+    second = generator.generate_trade_data(years=2, engine='numpy', seed=42)
+    pd.testing.assert_frame_equal(first, second)
+
+def test_numpy_engine_allocation_bounds(generator):
+    rng = np.random.default_rng(1)
+    totals = np.full(1000, 1e6)
+    pair_ids, item_ids, values = generator._allocate_commodity_values_numpy(totals, rng)
+    per_pair = np.bincount(pair_ids, weights=values, minlength=len(totals))
+    # Every pair keeps some unallocated remainder and picks at least one item per category
+    assert (per_pair < totals).all()
+    assert np.bincount(pair_ids).min() >= len(generator.commodities)
+    # No commodity is picked twice for the same pair
+    assert len(set(zip(pair_ids.tolist(), item_ids.tolist()))) == len(pair_ids)
+
+def test_unknown_engine_raises(generator):
+    with pytest.raises(ValueError):
+        generator.generate_trade_data(engine='spark')
+
+def test_chunks_have_fixed_size(generator):
+    chunks = list(generator.iter_trade_data_chunks(years=2, chunk_rows=500, seed=7))
+    assert all(len(chunk) == 500 for chunk in chunks[:-1])
+    assert 0 < len(chunks[-1]) <= 500
+    combined = pd.concat(chunks, ignore_index=True)
+    # Every (year, reporter, partner) combination is covered
+    pairs = combined[['Year', 'Reporter', 'Partner']].drop_duplicates()
+    assert len(pairs) == 2 * len(generator.countries) * (len(generator.countries) - 1)
+
+def test_write_chunks_reports_throughput(generator, tmp_path):
+    stats = generator.write_trade_data_chunks(tmp_path, years=1, chunk_rows=400, seed=1)
+    files = sorted(tmp_path.glob('part-*.csv'))
+    assert stats['files'] == len(files)
+    assert stats['rows'] == sum(len(pd.read_csv(f)) for f in files)
+    assert stats['rows_per_sec'] > 0
+
+@pytest.mark.parametrize('shard_by', ['year', 'reporter'])
+def test_sharded_output_independent_of_worker_count(generator, shard_by):
+    serial = generator.generate_trade_data_sharded(
+        years=2, seed=11, shard_by=shard_by, n_workers=1, end_year=2024
+    )
+    parallel = generator.generate_trade_data_sharded(
+        years=2, seed=11, shard_by=shard_by, n_workers=2, end_year=2024
+    )
+    pd.testing.assert_frame_equal(serial, parallel)
+    assert sorted(serial['Year'].unique()) == [2023, 2024]
+
+def test_sharded_seeds_differ(generator):
+    first = generator.generate_trade_data_sharded(years=1, seed=1, n_workers=1)
+    second = generator.generate_trade_data_sharded(years=1, seed=2, n_workers=1)
+    assert not first['TradeValue'].head(10).equals(second['TradeValue'].head(10))
+
+@pytest.mark.parametrize('scale_factor', [1, 10])
+def test_scale_factor_row_count_is_exact(scale_factor):
+    generator = TradeDataGenerator(scale_factor=scale_factor)
+    profile = SCALE_FACTORS[scale_factor]
+    data = generator.generate_trade_data(engine='numpy', seed=3)
+    assert len(data) == generator.expected_row_count() == 100000 * scale_factor
+    assert data['Reporter'].nunique() == profile['countries']
+    assert data['Year'].nunique() == profile['years']
+    partners = data.groupby('Reporter', observed=True)['Partner'].nunique()
+    assert (partners == profile['partners_per_reporter']).all()
+    assert not data.duplicated(['Year', 'Reporter', 'Partner', 'Commodity']).any()
+
+def test_profiled_generator_defaults_to_profile_row_count():
+    generator = TradeDataGenerator(scale_factor=1)
+    assert len(generator.generate_trade_data(years=1)) == generator.expected_row_count(years=1) == 20000
+    with pytest.raises(ValueError):
+        generator.generate_trade_data(years=1, engine='python')
+
+def test_unknown_scale_factor_raises():
+    with pytest.raises(ValueError):
+        TradeDataGenerator(scale_factor=3)
+
+def test_star_schema_round_trips_to_wide_frame(generator):
+    star = generator.generate_star_schema(years=2, seed=9)
+    wide = generator.generate_trade_data(years=2, engine='numpy', seed=9)
+    pd.testing.assert_frame_equal(denormalize_star_schema(star), wide)
+    assert not {'Reporter_Lat', 'Reporter', 'Commodity'} & set(star['facts'].columns)
+
+def test_star_schema_saves_memory(generator):
+    star = generator.generate_star_schema(years=1, seed=2)
+    report = star_schema_memory_report(star)
+    assert report['saved_bytes'] > 0
+    assert report['normalized_bytes'] + report['saved_bytes'] == report['denormalized_bytes']
+
+def test_attach_country_coordinates_from_keys(generator):
+    star = generator.generate_star_schema(years=1, seed=2)
+    facts = attach_country_coordinates(star['facts'].head(20), star['countries'])
+    usa = facts[facts['Reporter'] == 'USA']
+    assert (usa['Reporter_Lat'] == generator.country_coords['USA']['lat']).all()
+
+def test_attach_country_coordinates_defaults_to_builtin_table(generator):
+    data = pd.DataFrame({'Reporter': ['USA', 'Atlantis'], 'Partner': ['Japan', 'USA'], 'TradeValue': [1.0, 2.0]})
+    result = attach_country_coordinates(data)
+    assert result['Reporter_Lat'].iloc[0] == generator.country_coords['USA']['lat']
+    assert np.isnan(result['Reporter_Lon'].iloc[1])
+    with pytest.raises(ValueError, match='countries table'):
+        attach_country_coordinates(generator.generate_star_schema(years=1, seed=1)['facts'])
+    fig = TradeVisualization.create_trade_flow_map(data)
+    assert len(fig.data) > 0
+
+def test_visualization_does_not_import_the_generator():
+    code = "import sys, visualization; assert 'data_generator' not in sys.modules and 'streamlit' not in sys.modules"
+    subprocess.run([sys.executable, '-c', code], check=True)
+
+def test_batched_allocation_across_blocks(generator):
+    totals = np.linspace(1e6, 2e6, 500)
+    # 64 pairs per block over the whole commodity catalogue, so 500 pairs span several blocks
+    n_commodities = len(generator._commodity_labels())
+    pair_ids, item_ids, values = generator._allocate_values_batched(
+        totals, np.random.default_rng(0), max_block_cells=n_commodities * 64
+    )
+    assert np.array_equal(np.unique(pair_ids), np.arange(len(totals)))
+    per_pair = np.bincount(pair_ids, weights=values)
+    assert (per_pair < totals).all() and (per_pair > 0.5 * totals).all()
+
+def test_allocate_commodity_values_profile_mode():
+    generator = TradeDataGenerator(scale_factor=1)
+    allocation = generator.allocate_commodity_values(np.full(100, 1e6), seed=4)
+    assert (allocation.groupby('Pair').size() == generator.codes_per_pair).all()
+    # The first pick takes 10-30% of the total, so no single share exceeds 30%
+    assert allocation['TradeValue'].max() <= 0.3 * 1e6
@@ -0,0 +1,48 @@
+import pytest
+import pandas as pd
+from data_module import TradeData
+from snapshot_store import SnapshotStore
+
+@pytest.fixture
+def data_dir(tmp_path):
+    return str(tmp_path / 'sample_data')
+
+def test_second_construction_loads_snapshot(data_dir, monkeypatch):
+    first = TradeData(sample_data_dir=data_dir)
+    assert first.snapshot_store.exists()
+    
+    def fail(*args, **kwargs):
+        raise AssertionError("data should come from the snapshot")
+    
+    monkeypatch.setattr('data_generator.TradeDataGenerator.generate_trade_data', fail)
+    second = TradeData(sample_data_dir=data_dir)
+    pd.testing.assert_frame_equal(first.get_sample_trade_data(), second.get_sample_trade_data())
+
+def test_refresh_replaces_snapshot(data_dir):
+    trade_data = TradeData(sample_data_dir=data_dir)
+    before = trade_data.get_sample_trade_data()
+    after = trade_data.refresh_data()
+    assert not before['TradeValue'].equals(after['TradeValue'])
+    pd.testing.assert_frame_equal(SnapshotStore(data_dir).load(), after)
+
+def test_snapshot_round_trips_categoricals(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    data = pd.DataFrame({
+        'Reporter': pd.Categorical(['USA', 'China', 'USA']),
+        'TradeValue': [1.0, 2.0, 3.0]
+    })
+    store.save(data)
+    pd.testing.assert_frame_equal(store.load(), data)
+    assert store.clear() and not store.exists()
+
+def test_save_never_overwrites_a_loaded_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    first = pd.DataFrame({'TradeValue': [1.0, 2.0]})
+    store.save(first)
+    mapped_path = store.path
+    loaded = store.load()
+    second_path = store.save(pd.DataFrame({'TradeValue': [3.0]}))
+    assert second_path != mapped_path
+    pd.testing.assert_frame_equal(loaded, first)
+    pd.testing.assert_frame_equal(store.load(), pd.DataFrame({'TradeValue': [3.0]}))
+    assert [p.name for p in tmp_path.iterdir()] == ['trade_data.2.feather']
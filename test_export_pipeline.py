@@ -0,0 +1,60 @@
+import gzip
+import pandas as pd
+import pyarrow.csv as pacsv
+import pytest
+from modules.export_pipeline import BackgroundExport, stream_export
+from modules.trade_data import TradeData
+
+@pytest.fixture
+def trade_data():
+    return TradeData(n_countries=12, n_years=3)
+
+@pytest.mark.parametrize('file_format', ['csv', 'csv.gz', 'csv.zst', 'parquet'])
+def test_stream_export_round_trips(trade_data, tmp_path, file_format):
+    path = str(tmp_path / f"out.{file_format}")
+    progress = []
+    stats = stream_export(trade_data.data, path, file_format, chunk_rows=100,
+                          progress=lambda fraction, message: progress.append(fraction))
+    assert stats['rows'] == len(trade_data.data)
+    assert progress[-1] == 1.0 and len(progress) == -(-len(trade_data.data) // 100)
+    if file_format == 'parquet':
+        result = pd.read_parquet(path)
+    else:
+        result = pacsv.read_csv(path).to_pandas()
+    pd.testing.assert_frame_equal(result, trade_data.data, check_dtype=False)
+
+def test_gzip_export_is_plain_gzip(trade_data, tmp_path):
+    path = tmp_path / 'out.csv.gz'
+    stream_export(trade_data.data, str(path), 'gzip')
+    with gzip.open(path, 'rt') as f:
+        assert f.readline().strip().replace('"', '') == 'Year,Reporter,Partner,TradeValue,TradeFlow'
+
+def test_xlsx_export(trade_data, tmp_path):
+    pytest.importorskip('xlsxwriter')
+    path = tmp_path / 'out.xlsx'
+    stats = stream_export(trade_data.data.head(50), str(path), 'excel', chunk_rows=20)
+    assert stats['rows'] == 50 and path.stat().st_size > 0
+
+def test_failed_export_leaves_no_partial_file(trade_data, tmp_path):
+    with pytest.raises(ValueError):
+        stream_export(trade_data.data, str(tmp_path / 'out.txt'), 'txt')
+    assert list(tmp_path.iterdir()) == []
+
+def test_background_export_of_filtered_view(trade_data, tmp_path):
+    started, message = trade_data.start_export('parquet', filters={'years': [2011]}, output_dir=str(tmp_path))
+    assert started, message
+    assert trade_data._export.wait(timeout=30)
+    status = trade_data.export_status()
+    exported = pd.read_parquet(status['path'])
+    assert status['progress'] == 1.0
+    assert len(exported) == status['stats']['rows'] == 12 * 11
+    assert set(exported['Year']) == {2011}
+
+def test_background_export_reports_errors(tmp_path):
+    export = BackgroundExport()
+    assert export.start(pd.DataFrame({'a': [1]}), str(tmp_path / 'missing' / 'out.csv'))
+    assert not export.wait(timeout=30)
+    assert export.status()['error']
+
+def test_export_data_rejects_unknown_format(trade_data):
+    assert trade_data.export_data(format='pdf') == (False, 'Unsupported export format: pdf')
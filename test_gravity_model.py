@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from gravity_model import GravityModel, haversine_matrix
+from trade_analysis import AdvancedTradeAnalysis
+
+TRUE_BETA = {'const': -20.0, 'ln_gdp_exporter': 0.8, 'ln_gdp_importer': 0.9, 'ln_distance': -1.1}
+
+@pytest.fixture(scope='module')
+def model():
+    return GravityModel()
+
+@pytest.fixture(scope='module')
+def gravity_data(model):
+    """Export flows generated from known gravity coefficients"""
+    rng = np.random.default_rng(0)
+    rows = []
+    for year in (2015, 2016, 2017):
+        for exporter in model.countries:
+            for importer in model.countries:
+                if exporter == importer:
+                    continue
+                log_trade = (TRUE_BETA['const']
+                             + TRUE_BETA['ln_gdp_exporter'] * np.log(model.get_gdp(exporter, year))
+                             + TRUE_BETA['ln_gdp_importer'] * np.log(model.get_gdp(importer, year))
+                             + TRUE_BETA['ln_distance'] * np.log(model.get_distance(exporter, importer)))
+                rows.append({'Year': year, 'Reporter': exporter, 'Partner': importer,
+                             'TradeValue': np.exp(log_trade + rng.normal(0, 0.05)), 'TradeFlow': 'Export'})
+    return pd.DataFrame(rows)
+
+def test_haversine_matrix_known_distance():
+    # London to Paris is about 344 km
+    distances = haversine_matrix([51.5074, 48.8566], [-0.1278, 2.3522])
+    assert distances[0, 1] == pytest.approx(344, abs=2)
+    assert distances[0, 0] == 0 and distances[0, 1] == distances[1, 0]
+
+def test_gdp_lookup_uses_nearest_year(model):
+    assert model.get_gdp('USA', 2050) == model.get_gdp('USA', int(model.gdp.columns.max()))
+    assert model.get_gdp('USA', 2015) == pytest.approx(18.206e12)
+    assert np.isnan(model.get_gdp('Atlantis'))
+
+@pytest.mark.parametrize('method', ['ols', 'ppml'])
+def test_fit_recovers_coefficients(model, gravity_data, method):
+    fitted = GravityModel(model.indicators).fit(gravity_data, method=method)
+    for name, value in TRUE_BETA.items():
+        # The intercept is collinear with the large log-GDP terms, so allow it more slack
+        assert fitted.coefficients[name] == pytest.approx(value, abs=0.5 if name == 'const' else 0.1)
+    potential = fitted.trade_potential()
+    assert potential.shape == (len(model.countries),) * 2
+    assert np.nanmedian(potential.to_numpy()) == pytest.approx(1.0, abs=0.05)
+
+def test_trade_potential_uses_cached_fit(gravity_data):
+    analysis = AdvancedTradeAnalysis()
+    assert analysis.fit_gravity_model(gravity_data) is analysis.fit_gravity_model(gravity_data)
+    assert analysis.calculate_trade_potential(gravity_data, 'USA', 'China') == pytest.approx(1.0, abs=0.1)
+    assert np.isnan(analysis.calculate_trade_potential(gravity_data, 'USA', 'Atlantis'))
+    assert analysis._get_distance('USA', 'Canada') == pytest.approx(
+        analysis.fit_gravity_model(gravity_data).get_distance('USA', 'Canada'))
+
+def test_fits_reuse_the_reference_distance_matrix(gravity_data):
+    analysis = AdvancedTradeAnalysis()
+    reference = analysis._gravity_reference()
+    for method in ('ols', 'ppml'):
+        fitted = analysis.fit_gravity_model(gravity_data, method)
+        assert fitted.distances is reference.distances and fitted.gdp is reference.gdp
+    assert reference.coefficients is None
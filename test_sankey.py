@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from data_generator import TradeDataGenerator
+from modules.trade_data import TradeData
+from sankey import build_sankey, commodity_categories
+from trade_analysis import AdvancedTradeAnalysis
+
+@pytest.fixture(scope='module')
+def data():
+    return TradeDataGenerator().generate_trade_data(years=1, engine='numpy', seed=8)
+
+def test_links_match_groupby_without_pruning(data):
+    sankey = build_sankey(data, ['Reporter', 'Partner'], top_k=None)
+    nodes, links = sankey['nodes'], sankey['links']
+    labels = nodes['Label'].to_numpy()
+    result = dict(zip(zip(labels[links['Source']], labels[links['Target']]), links['Value']))
+    expected = data.groupby(['Reporter', 'Partner'], observed=True)['TradeValue'].sum()
+    assert result.keys() == {(str(r), str(p)) for r, p in expected.index}
+    np.testing.assert_allclose([result[(str(r), str(p))] for r, p in expected.index], expected.to_numpy())
+
+def test_top_k_pruning_keeps_totals(data):
+    frame = data.assign(Category=commodity_categories(data['Commodity']))
+    sankey = build_sankey(frame, ['Reporter', 'Category', 'Partner'], top_k=3)
+    nodes, links = sankey['nodes'], sankey['links']
+    for level in ['Reporter', 'Category', 'Partner']:
+        level_nodes = nodes[nodes['Level'] == level]
+        assert list(level_nodes['Label'][-1:]) == ['Other'] and len(level_nodes) == 4
+        assert level_nodes['Value'].sum() == pytest.approx(data['TradeValue'].sum())
+    # Every level carries the full volume, so each link layer does too
+    first_layer = links['Target'].isin(nodes.index[nodes['Level'] == 'Category'])
+    assert links.loc[first_layer, 'Value'].sum() == pytest.approx(links.loc[~first_layer, 'Value'].sum())
+    top = data.groupby('Reporter', observed=True)['TradeValue'].sum().nlargest(3)
+    assert list(nodes.loc[nodes['Level'] == 'Reporter', 'Label'][:3]) == list(top.index)
+
+def test_create_sankey_diagram_for_one_country(data):
+    fig = AdvancedTradeAnalysis().create_sankey_diagram(data, 'Japan', top_k=5, flow='Export')
+    sankey = fig.data[0]
+    assert sankey.node.label[0] == 'Japan' and 'Other' in sankey.node.label
+    exports = data[(data['Reporter'] == 'Japan') & (data['TradeFlow'] == 'Export')]['TradeValue'].sum()
+    assert sum(v for s, v in zip(sankey.link.source, sankey.link.value) if s == 0) == pytest.approx(exports)
+    assert fig.layout.title.text == 'Trade Flows from Japan'
+
+def test_create_sankey_diagram_without_commodities():
+    data = TradeData().data
+    fig = AdvancedTradeAnalysis().create_sankey_diagram(data, 'USA')
+    sankey = fig.data[0]
+    assert list(sankey.node.label[:1]) == ['USA'] and len(set(sankey.link.source)) == 1
+    assert sum(sankey.link.value) == pytest.approx(data.loc[data['Reporter'] == 'USA', 'TradeValue'].sum())
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_generator import TradeDataGenerator
+from tiva import MRIOTable, TiVAEngine
+from trade_analysis import AdvancedTradeAnalysis
+
+def _two_country_table():
+    # A exports 10 of goods to B for B's production and 20 straight to B's final demand
+    return pd.DataFrame([
+        ('A', 'Goods', 'A', 'Goods', 20.0),
+        ('A', 'Goods', 'B', 'Goods', 10.0),
+        ('B', 'Goods', 'A', 'Goods', 5.0),
+        ('A', 'Goods', 'A', 'Final demand', 50.0),
+        ('A', 'Goods', 'B', 'Final demand', 20.0),
+        ('B', 'Goods', 'B', 'Final demand', 45.0),
+    ], columns=['FromCountry', 'FromSector', 'ToCountry', 'ToSector', 'Value'])
+
+def test_decomposition_matches_dense_leontief():
+    table = MRIOTable(_two_country_table())
+    result = TiVAEngine().decompose(table)
+    L = np.linalg.inv(np.eye(2) - table.A.toarray())
+    embodied = table.va_share[:, None] * (L @ table.exports())
+    assert result.loc['A', 'Gross Exports'] == pytest.approx(30.0)
+    assert result.loc['A', 'Domestic Value Added'] == pytest.approx(embodied[0, 0])
+    assert result.loc['B', 'Foreign Value Added'] == pytest.approx(embodied[0, 1])
+    np.testing.assert_allclose(result['Domestic Value Added'] + result['Foreign Value Added'],
+                               result['Gross Exports'])
+
+def test_factorization_is_reused_per_table_version():
+    engine = TiVAEngine()
+    table = MRIOTable()
+    engine.decompose(table)
+    engine.value_added_origin(table, by_sector=True)
+    engine.leontief_solve(MRIOTable(), np.ones(len(table.index)))
+    assert engine.factorization_count == 1
+    changed = _two_country_table()
+    changed.loc[0, 'Value'] = 25.0
+    engine.decompose(MRIOTable(changed))
+    assert engine.factorization_count == 2
+
+def test_calculate_tiva_applies_shares_to_exports():
+    data = TradeDataGenerator().generate_trade_data(years=1, engine='numpy', seed=5)
+    analysis = AdvancedTradeAnalysis()
+    matrix = analysis.calculate_tiva_matrix(data)
+    exports = data[(data['Reporter'] == 'Japan') & (data['TradeFlow'] == 'Export')]['TradeValue'].sum()
+    result = analysis.calculate_tiva(data, 'Japan')
+    assert result.at[0, 'Total Value Added'] == pytest.approx(exports)
+    assert 0 < result.at[0, 'Foreign Value Added'] < result.at[0, 'Domestic Value Added']
+    assert len(matrix) == data['Reporter'].nunique()
+    assert analysis.calculate_tiva(data, 'Atlantis').iloc[0].tolist() == [0.0, 0.0, 0.0]
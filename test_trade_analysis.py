@@ -0,0 +1,143 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_generator import TradeDataGenerator
+from trade_analysis import AdvancedTradeAnalysis
+
+@pytest.fixture(scope='module')
+def data():
+    return TradeDataGenerator().generate_trade_data(years=2, engine='numpy', seed=5)
+
+@pytest.fixture
+def analysis():
+    return AdvancedTradeAnalysis()
+
+def _scan_rca(data, country, product):
+    country_exports = data[data['Reporter'] == country]
+    world_exports = data[data['Reporter'] != country]
+    country_share = (country_exports[country_exports['Commodity'] == product]['TradeValue'].sum() /
+                     country_exports['TradeValue'].sum())
+    world_share = (world_exports[world_exports['Commodity'] == product]['TradeValue'].sum() /
+                   world_exports['TradeValue'].sum())
+    return country_share / world_share
+
+def test_rca_matrix_matches_pairwise_scan(analysis, data):
+    matrix = analysis.calculate_rca_matrix(data)
+    for country, product in [('USA', matrix.columns[0]), ('Japan', matrix.columns[7])]:
+        assert matrix.at[country, product] == pytest.approx(_scan_rca(data, country, product))
+        assert analysis.calculate_rca(data, country, product) == pytest.approx(_scan_rca(data, country, product))
+    assert matrix.shape == (data['Reporter'].nunique(), data['Commodity'].nunique())
+
+def test_rca_matrix_per_year(analysis, data):
+    matrix = analysis.calculate_rca_matrix(data, by_year=True)
+    year = data['Year'].max()
+    product = matrix.columns[3]
+    expected = _scan_rca(data[data['Year'] == year], 'China', product)
+    assert matrix.loc[(year, 'China'), product] == pytest.approx(expected)
+
+def test_rca_matrix_cached_per_frame(analysis, data):
+    assert analysis.calculate_rca_matrix(data) is analysis.calculate_rca_matrix(data)
+    assert analysis.calculate_rca_matrix(data.copy()) is not analysis.calculate_rca_matrix(data)
+    assert np.isnan(analysis.calculate_rca(data, 'Atlantis', 'HS01'))
+
+def _scan_tii(data, exporter, partner):
+    exports = data[data['TradeFlow'] == 'Export']
+    x_ij = exports[(exports['Reporter'] == exporter) & (exports['Partner'] == partner)]['TradeValue'].sum()
+    x_i = exports[exports['Reporter'] == exporter]['TradeValue'].sum()
+    x_wj = exports[exports['Partner'] == partner]['TradeValue'].sum()
+    return (x_ij / x_i) / (x_wj / exports['TradeValue'].sum())
+
+def test_tii_matrix_uses_standard_formula(analysis, data):
+    matrix = analysis.calculate_tii_matrix(data)
+    assert matrix.shape == (data['Reporter'].nunique(),) * 2
+    assert matrix.at['USA', 'China'] == pytest.approx(_scan_tii(data, 'USA', 'China'))
+    assert analysis.calculate_tii(data, 'Japan', 'Germany') == pytest.approx(_scan_tii(data, 'Japan', 'Germany'))
+    # Export-share weighted intensities average to one for every exporter
+    shares = data[data['TradeFlow'] == 'Export'].groupby('Partner', observed=True)['TradeValue'].sum()
+    weights = (shares / shares.sum()).reindex(matrix.columns)
+    np.testing.assert_allclose(matrix.to_numpy() @ weights.to_numpy(), 1.0)
+
+def test_tii_matrix_per_year(analysis, data):
+    matrix = analysis.calculate_tii_matrix(data, by_year=True)
+    year = data['Year'].min()
+    expected = _scan_tii(data[data['Year'] == year], 'India', 'Brazil')
+    assert matrix.loc[(year, 'India'), 'Brazil'] == pytest.approx(expected)
+
+def _scan_gl(data, country, product):
+    rows = data[(data['Reporter'] == country) & (data['Commodity'] == product)]
+    exports = rows[rows['TradeFlow'] == 'Export']['TradeValue'].sum()
+    imports = rows[rows['TradeFlow'] == 'Import']['TradeValue'].sum()
+    return 1 - (abs(exports - imports) / (exports + imports))
+
+def test_grubel_lloyd_matrix_matches_scan(analysis, data):
+    matrix = analysis.calculate_grubel_lloyd_matrix(data)
+    product = matrix.columns[5]
+    assert matrix.at['UK', product] == pytest.approx(_scan_gl(data, 'UK', product))
+    assert analysis.calculate_grubel_lloyd(data, 'UK', product) == pytest.approx(_scan_gl(data, 'UK', product))
+    assert ((matrix >= 0) & (matrix <= 1) | matrix.isna()).all().all()
+    by_year = analysis.calculate_grubel_lloyd_matrix(data, by_year=True)
+    year = data['Year'].max()
+    assert by_year.loc[(year, 'UK'), product] == pytest.approx(_scan_gl(data[data['Year'] == year], 'UK', product))
+
+def test_grubel_lloyd_category_aggregate(analysis, data):
+    aggregate = analysis.calculate_grubel_lloyd_aggregate(data)
+    category = aggregate.columns[0]
+    rows = data[(data['Reporter'] == 'France') & data['Commodity'].str.startswith(category + ' - ')]
+    flows = rows.pivot_table(index='Commodity', columns='TradeFlow', values='TradeValue',
+                             aggfunc='sum', fill_value=0.0, observed=True)
+    expected = 1 - (flows['Export'] - flows['Import']).abs().sum() / (flows['Export'] + flows['Import']).sum()
+    assert aggregate.at['France', category] == pytest.approx(expected)
+    assert set(aggregate.columns) == {label.split(' - ')[0] for label in data['Commodity'].unique()}
+
+def _scan_complementarity(data, country1, country2):
+    exports = data[(data['Reporter'] == country1) & (data['TradeFlow'] == 'Export')]
+    imports = data[(data['Reporter'] == country2) & (data['TradeFlow'] == 'Import')]
+    export_shares = exports.groupby('Commodity', observed=True)['TradeValue'].sum() / exports['TradeValue'].sum()
+    import_shares = imports.groupby('Commodity', observed=True)['TradeValue'].sum() / imports['TradeValue'].sum()
+    common = export_shares.index.intersection(import_shares.index)
+    return np.minimum(export_shares[common], import_shares[common]).sum()
+
+def test_complementarity_matrix_matches_pairwise(analysis, data):
+    # A tiny block size forces one exporter per broadcast block
+    matrix = analysis.calculate_complementarity_matrix(data, max_block_cells=1)
+    assert matrix.at['USA', 'India'] == pytest.approx(_scan_complementarity(data, 'USA', 'India'))
+    pd.testing.assert_frame_equal(matrix, analysis.calculate_complementarity_matrix(data))
+    assert analysis.calculate_trade_complementarity(data, 'Germany', 'China') == pytest.approx(
+        _scan_complementarity(data, 'Germany', 'China'))
+    assert ((matrix >= 0) & (matrix <= 1 + 1e-12)).all().all()
+
+def test_rank_complementary_partners(analysis, data):
+    ranking = analysis.rank_complementary_partners(data, top_n=3)
+    usa = ranking[ranking['Exporter'] == 'USA']
+    assert list(usa['Rank']) == [1, 2, 3]
+    assert 'USA' not in set(usa['Importer'])
+    assert usa['Complementarity'].is_monotonic_decreasing
+    best = analysis.calculate_complementarity_matrix(data).loc['USA'].drop('USA').max()
+    assert usa['Complementarity'].iloc[0] == pytest.approx(best)
+
+@pytest.mark.parametrize('split', ['year', 'reporter'])
+def test_append_data_matches_full_rebuild(analysis, data, split):
+    last_year = data['Year'].max()
+    if split == 'year':
+        batch_mask = data['Year'] == last_year
+    else:
+        batch_mask = (data['Year'] == last_year) & (data['Reporter'] == 'Japan')
+    history, batch = data[~batch_mask], data[batch_mask]
+    analysis.calculate_rca_matrix(history, by_year=True)
+    analysis.calculate_tii_matrix(history, by_year=True)
+    analysis.calculate_grubel_lloyd_matrix(history, by_year=True)
+    combined = analysis.append_data(history, batch, verify=True)
+    
+    assert len(combined) == len(data)
+    assert analysis.verify_incremental(combined)[0]
+    expected = AdvancedTradeAnalysis()
+    pd.testing.assert_frame_equal(analysis.calculate_complementarity_matrix(combined),
+                                  expected.calculate_complementarity_matrix(data), check_exact=False)
+    pd.testing.assert_frame_equal(analysis.calculate_grubel_lloyd_matrix(combined, by_year=True),
+                                  expected.calculate_grubel_lloyd_matrix(data, by_year=True), check_exact=False)
+
+def test_verify_incremental_detects_stale_results(analysis, data):
+    combined = analysis.append_data(data.iloc[:100], data.iloc[100:200])
+    analysis.calculate_rca_matrix(combined)
+    combined.loc[0, 'TradeValue'] += 1e9
+    assert not analysis.verify_incremental(combined)[0]
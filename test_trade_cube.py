@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+import pytest
+from data_generator import TradeDataGenerator
+from trade_cube import TradeCube
+
+@pytest.fixture(scope='module')
+def data():
+    return TradeDataGenerator().generate_trade_data(years=2, engine='numpy', seed=3)
+
+@pytest.fixture
+def cube(data):
+    return TradeCube(data)
+
+@pytest.mark.parametrize('by', [
+    ['Year'], ['TradeFlow', 'Year'], ['Reporter', 'Partner'], ['Commodity', 'Reporter', 'TradeFlow']
+])
+def test_rollups_match_groupby(cube, data, by):
+    expected = data.groupby(by, observed=True)['TradeValue'].agg(['sum', 'count'])
+    result = cube.aggregate(by).set_index(by)
+    np.testing.assert_allclose(result['TradeValue'].to_numpy(), expected['sum'].to_numpy())
+    np.testing.assert_array_equal(result['Count'].to_numpy(), expected['count'].to_numpy())
+    assert list(result.index) == list(expected.index)
+
+def test_where_filters(cube, data):
+    rows = data[(data['TradeFlow'] == 'Export') & data['Reporter'].isin(['USA', 'Japan'])]
+    expected = rows.groupby('Partner', observed=True)['TradeValue'].sum()
+    result = cube.sum(['Partner'], where={'TradeFlow': 'Export', 'Reporter': ['USA', 'Japan', 'Atlantis']})
+    np.testing.assert_allclose(result.to_numpy(), expected.to_numpy())
+    assert cube.total(where={'Reporter': 'USA'}) == pytest.approx(data.loc[data['Reporter'] == 'USA', 'TradeValue'].sum())
+    assert cube.count() == len(data)
+    assert cube.sum(['Year'], where={'Reporter': 'Atlantis'}).empty
+
+def test_rollups_are_cached_and_derived_from_finer_ones(cube):
+    fine = cube.rollup(['Year', 'Reporter', 'TradeFlow'])
+    assert cube.rollup(['Year', 'Reporter', 'TradeFlow']) is fine
+    coarse = cube.rollup(['Reporter'])
+    assert coarse.sums.sum() == pytest.approx(fine.sums.sum())
+    with pytest.raises(KeyError):
+        cube.rollup(['Continent'])
+
+def test_appended_cube_matches_rebuild(data):
+    last_year = data['Year'].max()
+    history, batch = data[data['Year'] < last_year], data[data['Year'] == last_year].copy()
+    batch['Reporter'] = batch['Reporter'].astype(object)
+    batch.loc[batch.index[:5], 'Reporter'] = 'Atlantis'
+    base = TradeCube(history).prepare(('Year', 'Reporter'), ('Commodity',))
+    extended = base.appended(batch)
+    rebuilt = TradeCube(pd.concat([history, batch]))
+    for by in [['Year', 'Reporter'], ['Commodity'], ['Reporter', 'Partner', 'TradeFlow']]:
+        pd.testing.assert_frame_equal(extended.aggregate(by), rebuilt.aggregate(by), check_dtype=False)
+    assert extended.n_rows == len(data) and base.n_rows == len(history)
+    assert 'Atlantis' not in base.labels['Reporter']
+
+def test_rows_with_missing_dimensions_are_dropped(data):
+    gaps = data.copy()
+    gaps['Reporter'] = gaps['Reporter'].astype(object)
+    gaps.loc[gaps.index[:3], 'Reporter'] = None
+    gaps.loc[gaps.index[3:5], 'Commodity'] = None
+    expected = gaps.dropna(subset=['Reporter', 'Commodity'])
+    cube = TradeCube(gaps)
+    assert cube.count() == len(expected)
+    assert cube.total() == pytest.approx(expected['TradeValue'].sum())
+    extended = TradeCube(data.iloc[:0]).appended(gaps)
+    pd.testing.assert_frame_equal(extended.aggregate(['Reporter']), cube.aggregate(['Reporter']), check_dtype=False)
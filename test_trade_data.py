@@ -0,0 +1,201 @@
+import gc
+import numpy as np
+import pandas as pd
+import pytest
+from modules.shared_dataset import SharedDatasetRegistry
+from modules.filter_cache import FilterResultCache, canonical_filter_spec
+from modules.filter_index import SortedValueIndex
+from modules.trade_data import TradeData
+
+@pytest.fixture
+def registry():
+    return SharedDatasetRegistry()
+
+def test_sessions_share_one_copy(registry):
+    first = TradeData(registry=registry)
+    second = TradeData(registry=registry)
+    assert np.shares_memory(
+        first.data['TradeValue'].to_numpy(), second.data['TradeValue'].to_numpy()
+    )
+    assert registry.stats('trade_data') == {1: 2}
+
+def test_shared_view_is_read_only(registry):
+    session = TradeData(registry=registry)
+    # Check the published buffers themselves; copy-on-write alone already makes to_numpy() read-only
+    published = registry._current['trade_data'].data
+    for frame in (published, session.data):
+        for column in ('Year', 'TradeValue'):
+            assert frame[column].array._ndarray.flags.writeable is False
+    # Derived columns stay private to the session
+    session.data['Scaled'] = session.data['TradeValue'] / 1e9
+    assert 'Scaled' not in TradeData(registry=registry).data.columns
+
+def test_refresh_publishes_new_version(registry):
+    reader = TradeData(registry=registry)
+    writer = TradeData(registry=registry)
+    old_data = reader.data
+    assert writer.refresh_data()
+    assert writer.data_version == 2
+    # The reader keeps its snapshot until its next read boundary
+    assert reader.data is old_data
+    assert registry.stats('trade_data') == {1: 1, 2: 1}
+    reader.get_sample_trade_data()
+    assert reader.data_version == 2
+    assert registry.stats('trade_data') == {2: 2}
+
+def test_retired_version_dropped_when_lease_collected(registry):
+    reader = TradeData(registry=registry)
+    registry.publish('trade_data', reader.data.head(10))
+    assert 1 in registry.stats('trade_data')
+    del reader
+    gc.collect()
+    assert registry.stats('trade_data') == {2: 0}
+
+def test_acquire_without_loader_raises(registry):
+    with pytest.raises(KeyError):
+        registry.acquire('missing')
+
+def test_standalone_mode_unchanged():
+    session = TradeData()
+    assert session.data_version is None
+    assert len(session.get_sample_trade_data()) == 13 * 10 * 9
+
+def test_background_refresh_swaps_atomically(registry):
+    session = TradeData(registry=registry)
+    old_data = session.get_sample_trade_data()
+    started, _ = session.start_background_refresh()
+    assert started
+    assert registry.wait_for_refresh('trade_data', timeout=30)
+    status = session.refresh_status()
+    assert status['progress'] == 1.0 and status['version'] == 2
+    # The session still holds version 1 until its next read
+    assert session.data is old_data
+    session.get_sample_trade_data()
+    assert session.data_version == 2
+    assert set(session.get_aggregates()) == {'by_year', 'by_reporter'}
+    by_year = session.get_aggregates()['by_year']
+    assert by_year['TradeValue'].sum() == pytest.approx(session.data['TradeValue'].sum())
+
+def test_background_refresh_reports_failure(registry):
+    def failing_builder(progress):
+        progress(0.5, 'half way')
+        raise RuntimeError('source unavailable')
+
+    registry.publish('trade_data', TradeData().data)
+    assert registry.refresh_in_background('trade_data', failing_builder)
+    assert not registry.wait_for_refresh('trade_data', timeout=30)
+    assert 'source unavailable' in registry.refresh_status('trade_data')['error']
+    assert registry.current_version('trade_data') == 1
+
+def test_sample_data_covers_every_pair_once():
+    session = TradeData(n_countries=25, n_years=4)
+    data = session.data
+    assert len(data) == 4 * 25 * 24
+    assert list(data.columns) == ['Year', 'Reporter', 'Partner', 'TradeValue', 'TradeFlow']
+    assert (data['Reporter'] != data['Partner']).all()
+    assert not data.duplicated(['Year', 'Reporter', 'Partner']).any()
+    assert data['TradeValue'].between(1e6, 1e9).all()
+    assert set(data['TradeFlow']) == {'Import', 'Export'}
+    assert sorted(data['Year'].unique()) == [2010, 2011, 2012, 2013]
+
+def test_load_sample_data_resizes():
+    session = TradeData()
+    session.load_sample_data(n_countries=3, n_years=1)
+    assert len(session.data) == 6
+    assert set(session.data['Reporter']) == {'USA', 'China', 'Germany'}
+    with pytest.raises(ValueError):
+        session.load_sample_data(n_countries=1)
+    assert session.n_countries == 3
+
+def _scan_filter(data, years=None, countries=None, min_trade_value=None, trade_type=None):
+    mask = np.ones(len(data), dtype=bool)
+    if years:
+        mask &= data['Year'].isin(years).to_numpy()
+    if countries:
+        mask &= (data['Reporter'].isin(countries) | data['Partner'].isin(countries)).to_numpy()
+    if min_trade_value is not None:
+        mask &= (data['TradeValue'] >= min_trade_value).to_numpy()
+    if trade_type and trade_type.lower() != 'all':
+        mask &= (data['TradeFlow'] == trade_type).to_numpy()
+    return data[mask]
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'years': [2011, 2013]},
+    {'countries': ['USA', 'Country 020', 'Atlantis']},
+    {'countries': ['USA'], 'trade_type': 'Export', 'min_trade_value': 5e8},
+    {'years': list(range(2010, 2014)), 'trade_type': 'All'},
+])
+def test_indexed_filter_matches_column_scan(filters):
+    session = TradeData(n_countries=30, n_years=4)
+    pd.testing.assert_frame_equal(session.filter_data(**filters), _scan_filter(session.data, **filters))
+
+def test_filter_index_shared_per_version(registry):
+    first = TradeData(registry=registry)
+    second = TradeData(registry=registry)
+    assert first._get_derived()['filter_index'] is second._get_derived()['filter_index']
+    assert len(first.filter_data(years=[2010], trade_type='Import')) > 0
+
+def test_version_published_without_derived_results(registry):
+    session = TradeData(registry=registry)
+    registry.publish('trade_data', session.data.head(40))
+    assert len(session.filter_data(trade_type='Export')) == (session.data['TradeFlow'] == 'Export').sum()
+    assert session.data_version == 2 and len(session.data) == 40
+    assert session.get_trade_value_range() == (session.data['TradeValue'].min(), session.data['TradeValue'].max())
+
+def test_sorted_value_index_range_queries():
+    values = pd.Series([5.0, 1.0, np.nan, 3.0, 5.0, 9.0])
+    index = SortedValueIndex(values)
+    assert sorted(index.rows(low=3.0)) == [0, 3, 4, 5]
+    assert sorted(index.rows(low=2.0, high=5.0)) == [0, 3, 4]
+    assert index.count(high=0.5) == 0
+    assert index.value_range() == (1.0, 9.0)
+    np.testing.assert_array_equal(index.mask(low=3.0), (values >= 3.0).to_numpy())
+
+def test_filter_by_reporters_flows_and_value_range():
+    session = TradeData(n_countries=12, n_years=3)
+    data = session.data
+    result = session.filter_data(reporters=['USA', 'Japan'], trade_type=['Export'],
+                                 min_trade_value=2e8, max_trade_value=6e8)
+    expected = data[data['Reporter'].isin(['USA', 'Japan']) & (data['TradeFlow'] == 'Export')
+                    & data['TradeValue'].between(2e8, 6e8)]
+    pd.testing.assert_frame_equal(result, expected)
+    assert session.get_trade_value_range() == (data['TradeValue'].min(), data['TradeValue'].max())
+
+def test_filter_spec_is_order_insensitive():
+    first = canonical_filter_spec(years=[np.int64(2012), 2010], countries=['USA', 'China'], trade_type='All')
+    second = canonical_filter_spec(years=(2010, 2012, 2012), countries={'China', 'USA'}, trade_type=None)
+    assert first == second
+    assert canonical_filter_spec(trade_type='Export') == canonical_filter_spec(trade_type=['Export'])
+
+def test_filter_cache_hits_and_version_keys(registry):
+    cache = FilterResultCache()
+    session = TradeData(registry=registry, cache=cache)
+    first = session.filter_data(years=[2011, 2010], trade_type='Export')
+    second = session.filter_data(years=[2010, 2011], trade_type='Export')
+    pd.testing.assert_frame_equal(first, second)
+    assert (cache.hits, cache.misses) == (1, 1)
+    # A new dataset version never reuses results from the old one
+    session.refresh_data()
+    session.filter_data(years=[2010, 2011], trade_type='Export')
+    assert cache.misses == 2
+
+def test_filter_cache_miss_result_is_not_the_cached_frame(registry):
+    session = TradeData(registry=registry, cache=FilterResultCache())
+    first = session.filter_data(years=[2010])
+    first['Extra'] = 1
+    assert 'Extra' not in session.filter_data(years=[2010]).columns
+
+def test_filter_cache_evicts_least_recently_used():
+    session = TradeData(n_countries=20, n_years=4)
+    results = [session.filter_data(years=[year]) for year in (2010, 2011, 2012)]
+    size = int(results[0].memory_usage(index=True, deep=True).sum())
+    cache = FilterResultCache(max_bytes=2 * size + size // 2)
+    cache.put('a', results[0])
+    cache.put('b', results[1])
+    assert cache.get('a') is not None
+    cache.put('c', results[2])
+    assert cache.get('b') is None and cache.get('a') is not None
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['bytes'] <= cache.max_bytes
+    assert not cache.put('huge', session.data)
@@ -0,0 +1,150 @@
+import hashlib
+import os
+import threading
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from typing import Dict, Optional
+
+# Illustrative 11-region x 9-sector input-output table (USD millions, 2020 scale)
+BUNDLED_MRIO = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'reference_data', 'mrio_table.csv')
+FINAL_DEMAND = 'Final demand'
+
+def load_mrio_table(path: str = BUNDLED_MRIO) -> pd.DataFrame:
+    """Load the offline FromCountry/FromSector/ToCountry/ToSector/Value table"""
+    return pd.read_csv(path)
+
+class MRIOTable:
+    """Multi-region input-output table in sparse form
+
+    Rows of the long table with ToSector 'Final demand' are final use by
+    the destination country; every other row is an intermediate flow.
+    Gross output is intermediate plus final use, and value added is output
+    less intermediate inputs. `version` is a hash of the flows, so identical
+    tables share cached factorizations.
+    """
+
+    def __init__(self, flows: Optional[pd.DataFrame] = None):
+        flows = load_mrio_table() if flows is None else flows
+        intermediate = flows['ToSector'] != FINAL_DEMAND
+        self.countries = pd.Index(sorted(set(flows['FromCountry']) | set(flows['ToCountry'])), name='Country')
+        self.sectors = pd.Index(sorted(set(flows['FromSector']) | set(flows.loc[intermediate, 'ToSector'])),
+                                name='Sector')
+        self.index = pd.MultiIndex.from_product([self.countries, self.sectors], names=['Country', 'Sector'])
+        n, n_countries = len(self.index), len(self.countries)
+
+        rows = self.index.get_indexer(pd.MultiIndex.from_arrays([flows['FromCountry'], flows['FromSector']]))
+        destinations = self.countries.get_indexer(flows['ToCountry'])
+        values = flows['Value'].to_numpy(dtype=float)
+        cols = self.index.get_indexer(pd.MultiIndex.from_arrays(
+            [flows.loc[intermediate, 'ToCountry'], flows.loc[intermediate, 'ToSector']]
+        ))
+        mask = intermediate.to_numpy()
+        self.Z = sp.csc_matrix((values[mask], (rows[mask], cols)), shape=(n, n))
+        self.final_demand = sp.csc_matrix((values[~mask], (rows[~mask], destinations[~mask])),
+                                          shape=(n, n_countries)).toarray()
+        self.output = np.asarray(self.Z.sum(axis=1)).ravel() + self.final_demand.sum(axis=1)
+        with np.errstate(divide='ignore'):
+            scale = np.where(self.output > 0, 1.0 / self.output, 0.0)
+        self.A = (self.Z @ sp.diags(scale)).tocsc()
+        self.value_added = self.output - np.asarray(self.Z.sum(axis=0)).ravel()
+        self.va_share = self.value_added * scale
+        self.country_of = np.repeat(np.arange(n_countries), len(self.sectors))
+        self.version = hashlib.sha1(
+            pd.util.hash_pandas_object(flows[['FromCountry', 'FromSector', 'ToCountry', 'ToSector', 'Value']],
+                                       index=False).to_numpy().tobytes()
+        ).hexdigest()[:16]
+
+    def exports(self) -> np.ndarray:
+        """Gross exports (n x countries): each row's sales to other countries, intermediate and final"""
+        n_countries = len(self.countries)
+        Z = self.Z.tocoo()
+        foreign = self.country_of[Z.row] != self.country_of[Z.col]
+        intermediate = np.bincount(Z.row[foreign], weights=Z.data[foreign], minlength=len(self.index))
+        final = self.final_demand.copy()
+        final[np.arange(len(self.index)), self.country_of] = 0.0
+        exports = np.zeros((len(self.index), n_countries))
+        # A row only exports on behalf of its own country
+        exports[np.arange(len(self.index)), self.country_of] = intermediate + final.sum(axis=1)
+        return exports
+
+class TiVAEngine:
+    """Trade in value added from MRIO tables, with the Leontief factorization cached per table version
+
+    L = (I - A)^-1 is never formed: I - A is factorized once by sparse LU
+    and every query solves against that factorization, for all exporting
+    countries at once.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._factorizations: Dict[str, object] = {}
+        self._results: Dict[tuple, pd.DataFrame] = {}
+        self.factorization_count = 0
+
+    def leontief_solver(self, table: MRIOTable):
+        """Sparse LU of I - A for `table`, computed on first use of its version"""
+        with self._lock:
+            solver = self._factorizations.get(table.version)
+            if solver is None:
+                identity = sp.identity(len(table.index), format='csc')
+                solver = splu((identity - table.A).tocsc())
+                self._factorizations[table.version] = solver
+                self.factorization_count += 1
+            return solver
+
+    def leontief_solve(self, table: MRIOTable, rhs: np.ndarray) -> np.ndarray:
+        """L @ rhs, using the cached factorization"""
+        return self.leontief_solver(table).solve(np.asarray(rhs, dtype=float))
+
+    def _cached(self, table: MRIOTable, key: str, build):
+        with self._lock:
+            result = self._results.get((table.version, key))
+        if result is None:
+            result = build()
+            with self._lock:
+                self._results[(table.version, key)] = result
+        return result
+
+    def value_added_origin(self, table: MRIOTable, by_sector: bool = False) -> pd.DataFrame:
+        """Value added from each source country (and sector) embodied in each country's gross exports
+
+        Columns are exporting countries; the diagonal (by country) is domestic
+        value added and the rest of each column is foreign value added.
+        """
+        def build():
+            # diag(v) L E: every exporter's export vector solved in one call
+            embodied = table.va_share[:, None] * self.leontief_solve(table, table.exports())
+            frame = pd.DataFrame(embodied, index=table.index, columns=table.countries.rename('Exporter'))
+            if by_sector:
+                return frame
+            return frame.groupby(level='Country').sum().rename_axis('Source')
+        return self._cached(table, f'origin_{by_sector}', build)
+
+    def decompose(self, table: MRIOTable) -> pd.DataFrame:
+        """Domestic/foreign value-added split of gross exports for every country"""
+        def build():
+            origin = self.value_added_origin(table).to_numpy()
+            gross = table.exports().sum(axis=0)
+            domestic = np.diag(origin).copy()
+            foreign = origin.sum(axis=0) - domestic
+            with np.errstate(divide='ignore', invalid='ignore'):
+                return pd.DataFrame({
+                    'Gross Exports': gross,
+                    'Domestic Value Added': domestic,
+                    'Foreign Value Added': foreign,
+                    'DVA Share': domestic / gross,
+                    'FVA Share': foreign / gross
+                }, index=table.countries)
+        return self._cached(table, 'decompose', build)
+
+    def clear(self):
+        """Drop cached factorizations and results"""
+        with self._lock:
+            self._factorizations.clear()
+            self._results.clear()
+
+# Global instance
+tiva_engine = TiVAEngine()
@@ -1,191 +1,493 @@
+import weakref
 import pandas as pd
 import numpy as np
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
 import plotly.graph_objects as go
 from scipy import stats
+from commodity_hierarchy import HS_SECTIONS, SITC_SECTIONS, CommodityHierarchy
+from concordance import Concordance
+from gravity_model import GravityModel
+from sankey import build_sankey, commodity_categories, create_sankey_figure
+from tiva import MRIOTable, tiva_engine
+from trade_cube import TradeCube
+
+# SITC sections making up each production stage
+VALUE_CHAIN_STAGES = {
+    'raw_materials': ['0', '1', '2', '3'],
+    'intermediate': ['5', '6'],
+    'final': ['7', '8']
+}
+
+class _ResultCache:
+    """Results computed from a DataFrame, kept until that frame is garbage collected
+
+    DataFrames are unhashable, so entries are keyed by id() and verified
+    through a weak reference. Frames modified in place need clear().
+    """
+    
+    def __init__(self):
+        self._entries = {}
+    
+    def _results(self, data: pd.DataFrame) -> Dict[Hashable, object]:
+        entry = self._entries.get(id(data))
+        if entry is None or entry[0]() is not data:
+            entry = (weakref.ref(data), {})
+            self._entries[id(data)] = entry
+            weakref.finalize(data, self._entries.pop, id(data), None)
+        return entry[1]
+    
+    def get(self, data: pd.DataFrame, key: Hashable, build: Callable[[], object]):
+        results = self._results(data)
+        if key not in results:
+            results[key] = build()
+        return results[key]
+    
+    def put(self, data: pd.DataFrame, key: Hashable, value: object):
+        self._results(data)[key] = value
+    
+    def items(self, data: pd.DataFrame) -> List[Tuple[Hashable, object]]:
+        """Cached (key, result) pairs for `data`"""
+        entry = self._entries.get(id(data))
+        if entry is None or entry[0]() is not data:
+            return []
+        return list(entry[1].items())
+    
+    def clear(self):
+        self._entries.clear()
 
 class AdvancedTradeAnalysis:
     def __init__(self):
-        self.sitc_codes = {
-            '0': 'Food and live animals',
-            '1': 'Beverages and tobacco',
-            '2': 'Crude materials, inedible',
-            '3': 'Mineral fuels, lubricants',
-            '4': 'Animal and vegetable oils',
-            '5': 'Chemicals',
-            '6': 'Manufactured goods',
-            '7': 'Machinery and transport',
-            '8': 'Miscellaneous manufactured',
-            '9': 'Commodities not classified'
-        }
+        self._cache = _ResultCache()
+        self._gravity = None
+        self._concordance = None
+        self._mrio = None
+        
+        self.sitc_codes = dict(SITC_SECTIONS)
+        self.hs_sections = dict(HS_SECTIONS)
+    
+    def get_cube(self, data: pd.DataFrame) -> TradeCube:
+        """Aggregate cube of `data`, built once per frame; the batch indices read from it"""
+        return self._cache.get(data, 'cube', lambda: TradeCube(data))
+    
+    def clear_cache(self):
+        """Forget cached matrices, e.g. after modifying a frame in place"""
+        self._cache.clear()
+    
+    @staticmethod
+    def _countries(cube: TradeCube) -> pd.Index:
+        return pd.Index(sorted(set(cube.labels['Reporter']) | set(cube.labels['Partner'])))
+    
+    def append_data(self, data: pd.DataFrame, new_rows: pd.DataFrame, verify: bool = False) -> pd.DataFrame:
+        """Return `data` with `new_rows` appended, carrying cached aggregates forward
+        
+        The cube is extended with the new rows instead of being rebuilt, and
+        per-year matrices already cached for `data` are recomputed only for
+        the years the new rows touch; other slices are reused. Whole-history
+        matrices are rebuilt from the extended cube when next requested.
+        With `verify`, the result is checked against a full rebuild.
+        """
+        if set(new_rows.columns) != set(data.columns):
+            raise ValueError("Appended rows must have the same columns as the existing data")
+        combined = pd.concat([data, new_rows[data.columns]], ignore_index=True)
+        self._cache.put(combined, 'cube', self.get_cube(data).appended(new_rows))
+        years = sorted(pd.unique(new_rows['Year']).tolist())
+        
+        for key, value in self._cache.items(data):
+            if key == ('rca', True):
+                fresh = self._build_rca_matrix(combined, True, years)
+                self._cache.put(combined, key, self._merge_year_slices(value, fresh, years))
+            elif key[0] == 'tii' and key[1]:
+                fresh = self._build_tii_matrix(combined, True, key[2], years)
+                merged = self._merge_year_slices(value, fresh, years)
+                countries = self._countries(self.get_cube(combined))
+                rows = pd.MultiIndex.from_product(
+                    [merged.index.get_level_values('Year').unique(), countries], names=['Year', 'Reporter']
+                )
+                # Countries first seen in the new rows had no trade in the kept years
+                self._cache.put(combined, key, merged.reindex(index=rows, columns=countries.rename('Partner')))
+            elif key == ('flows', True):
+                fresh = self._build_flow_matrices(combined, True, years)
+                self._cache.put(combined, key, tuple(
+                    self._merge_year_slices(old, new, years).fillna(0.0) for old, new in zip(value, fresh)
+                ))
         
-        self.hs_sections = {
-            'I': 'Live animals; animal products',
-            'II': 'Vegetable products',
-            'III': 'Animal or vegetable fats',
-            'IV': 'Prepared foodstuffs',
-            'V': 'Mineral products',
-            'VI': 'Chemical products',
-            'VII': 'Plastics and rubber',
-            'VIII': 'Raw hides and skins',
-            'IX': 'Wood and articles',
-            'X': 'Pulp of wood',
-            'XI': 'Textiles and textile articles',
-            'XII': 'Footwear, headgear',
-            'XIII': 'Articles of stone',
-            'XIV': 'Natural or cultured pearls',
-            'XV': 'Base metals',
-            'XVI': 'Machinery and mechanical',
-            'XVII': 'Transport equipment',
-            'XVIII': 'Optical, photographic',
-            'XIX': 'Arms and ammunition',
-            'XX': 'Miscellaneous manufactured',
-            'XXI': 'Works of art',
-            'XXII': 'Special transactions'
+        if verify:
+            consistent, message = self.verify_incremental(combined)
+            if not consistent:
+                raise ValueError(message)
+        return combined
+    
+    @staticmethod
+    def _merge_year_slices(old: pd.DataFrame, fresh: pd.DataFrame, years: List) -> pd.DataFrame:
+        """Replace the `years` rows of a (Year, ...)-indexed matrix with freshly computed ones"""
+        kept = old[~old.index.get_level_values('Year').isin(years)]
+        merged = pd.concat([kept, fresh]).sort_index()
+        columns = old.columns.union(fresh.columns).rename(old.columns.name)
+        return merged.reindex(columns=columns)
+    
+    def verify_incremental(self, data: pd.DataFrame, rtol: float = 1e-9) -> Tuple[bool, str]:
+        """Compare the cube and cached matrices of `data` with a full rebuild"""
+        fresh = AdvancedTradeAnalysis()
+        rebuild = {
+            'rca': lambda key: fresh.calculate_rca_matrix(data, key[1]),
+            'tii': lambda key: fresh.calculate_tii_matrix(data, key[1], key[2]),
+            'flows': lambda key: fresh._export_import_matrices(data, key[1])
         }
+        try:
+            for key, value in self._cache.items(data):
+                if key == 'cube':
+                    rebuilt_cube = fresh.get_cube(data)
+                    for dims in list(value._rollups):
+                        pd.testing.assert_frame_equal(value.aggregate(dims), rebuilt_cube.aggregate(dims),
+                                                      check_dtype=False, check_exact=False, rtol=rtol)
+                elif isinstance(key, tuple) and key[0] in rebuild:
+                    expected = rebuild[key[0]](key)
+                    for got, want in zip(value if key[0] == 'flows' else [value],
+                                         expected if key[0] == 'flows' else [expected]):
+                        pd.testing.assert_frame_equal(got, want, check_dtype=False, check_exact=False,
+                                                      check_index_type=False, check_column_type=False, rtol=rtol)
+        except AssertionError as e:
+            return False, f"Incremental result for {key} differs from a full rebuild: {str(e)}"
+        return True, "Incremental aggregates match a full rebuild"
     
     def calculate_rca(self, data: pd.DataFrame, country: str, product: str) -> float:
         """Calculate Revealed Comparative Advantage (RCA)"""
-        country_exports = data[data['Reporter'] == country]
-        world_exports = data[data['Reporter'] != country]
-        
-        country_product_share = (
-            country_exports[country_exports['Commodity'] == product]['TradeValue'].sum() /
-            country_exports['TradeValue'].sum()
-        )
+        matrix = self.calculate_rca_matrix(data)
+        if country not in matrix.index or product not in matrix.columns:
+            return np.nan
+        return float(matrix.at[country, product])
+    
+    def calculate_rca_matrix(self, data: pd.DataFrame, by_year: bool = False) -> pd.DataFrame:
+        """Calculate Balassa RCA for every country and product in one pass
         
-        world_product_share = (
-            world_exports[world_exports['Commodity'] == product]['TradeValue'].sum() /
-            world_exports['TradeValue'].sum()
-        )
+        Rows are reporters (or (Year, Reporter) with `by_year`), columns are
+        commodities. As in calculate_rca, each country's product share is
+        compared with the rest of the world's. Results are cached per frame.
+        """
+        return self._cache.get(data, ('rca', by_year), lambda: self._build_rca_matrix(data, by_year))
+    
+    def _build_rca_matrix(self, data: pd.DataFrame, by_year: bool,
+                          years: Optional[List] = None) -> pd.DataFrame:
+        keys = ['Year', 'Reporter'] if by_year else ['Reporter']
+        where = {'Year': years} if years is not None else None
+        values = self.get_cube(data).sum(keys + ['Commodity'], where=where).unstack('Commodity', fill_value=0.0)
+        x = values.to_numpy(dtype=float)
+        country_total = x.sum(axis=1, keepdims=True)
+        if by_year:
+            # World totals are taken within each year
+            world_product = values.groupby(level='Year').transform('sum').to_numpy(dtype=float)
+        else:
+            world_product = x.sum(axis=0, keepdims=True)
+        world_total = world_product.sum(axis=1, keepdims=True)
         
-        return country_product_share / world_product_share
+        with np.errstate(divide='ignore', invalid='ignore'):
+            country_share = x / country_total
+            rest_share = (world_product - x) / (world_total - country_total)
+            rca = country_share / rest_share
+        return pd.DataFrame(rca, index=values.index, columns=values.columns)
     
     def calculate_tii(self, data: pd.DataFrame, country1: str, country2: str) -> float:
-        """Calculate Trade Intensity Index (TII)"""
-        bilateral_trade = data[
-            ((data['Reporter'] == country1) & (data['Partner'] == country2)) |
-            ((data['Reporter'] == country2) & (data['Partner'] == country1))
-        ]['TradeValue'].sum()
+        """Calculate Trade Intensity Index (TII) of country1's exports to country2"""
+        matrix = self.calculate_tii_matrix(data)
+        if country1 not in matrix.index or country2 not in matrix.columns:
+            return np.nan
+        return float(matrix.at[country1, country2])
+    
+    def calculate_tii_matrix(self, data: pd.DataFrame, by_year: bool = False,
+                             flow: Optional[str] = 'Export') -> pd.DataFrame:
+        """Calculate the Trade Intensity Index for every ordered country pair
         
-        total_trade1 = data[data['Reporter'] == country1]['TradeValue'].sum()
-        total_trade2 = data[data['Reporter'] == country2]['TradeValue'].sum()
-        world_trade = data['TradeValue'].sum()
+        TII_ij = (x_ij / X_i) / (x_wj / X_w): the share of i's exports going
+        to j, relative to the share of world exports going to j. Rows are
+        reporters (or (Year, Reporter) with `by_year`), columns partners.
+        `flow=None` uses every row instead of export flows only.
+        """
+        return self._cache.get(
+            data, ('tii', by_year, flow), lambda: self._build_tii_matrix(data, by_year, flow)
+        )
+    
+    def _build_tii_matrix(self, data: pd.DataFrame, by_year: bool, flow: Optional[str],
+                          years: Optional[List] = None) -> pd.DataFrame:
+        cube = self.get_cube(data)
+        countries = self._countries(cube)
+        where = {'TradeFlow': flow} if flow is not None else {}
+        if years is not None:
+            where['Year'] = years
+        keys = ['Year', 'Reporter'] if by_year else ['Reporter']
+        bilateral = cube.sum(keys + ['Partner'], where=where).unstack('Partner')
+        if by_year:
+            years = sorted(set(bilateral.index.get_level_values('Year')))
+            row_index = pd.MultiIndex.from_product([years, countries], names=keys)
+        else:
+            row_index = countries.rename('Reporter')
+        bilateral = bilateral.reindex(index=row_index, columns=countries, fill_value=0.0).fillna(0.0)
+        
+        x = bilateral.to_numpy(dtype=float)
+        exporter_total = x.sum(axis=1, keepdims=True)
+        if by_year:
+            # World exports to each partner, within each year
+            world_to_partner = bilateral.groupby(level='Year').transform('sum').to_numpy(dtype=float)
+        else:
+            world_to_partner = x.sum(axis=0, keepdims=True)
+        world_total = world_to_partner.sum(axis=1, keepdims=True)
         
-        return (bilateral_trade / (total_trade1 + total_trade2)) / (world_trade / (2 * world_trade))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            tii = (x / exporter_total) / (world_to_partner / world_total)
+        return pd.DataFrame(tii, index=bilateral.index, columns=countries.rename('Partner'))
     
     def calculate_grubel_lloyd(self, data: pd.DataFrame, country: str, product: str) -> float:
         """Calculate Grubel-Lloyd Index for intra-industry trade"""
-        exports = data[
-            (data['Reporter'] == country) & 
-            (data['Commodity'] == product) & 
-            (data['TradeFlow'] == 'Export')
-        ]['TradeValue'].sum()
+        matrix = self.calculate_grubel_lloyd_matrix(data)
+        if country not in matrix.index or product not in matrix.columns:
+            return np.nan
+        return float(matrix.at[country, product])
+    
+    def calculate_grubel_lloyd_matrix(self, data: pd.DataFrame, by_year: bool = False) -> pd.DataFrame:
+        """Calculate the Grubel-Lloyd index for every country and product
+        
+        Rows are reporters (or (Year, Reporter) with `by_year`), columns are
+        commodities; products a country neither exports nor imports are NaN.
+        """
+        def build():
+            exports, imports = self._export_import_matrices(data, by_year)
+            x, m = exports.to_numpy(), imports.to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                gl = 1 - np.abs(x - m) / (x + m)
+            return pd.DataFrame(gl, index=exports.index, columns=exports.columns)
+        return self._cache.get(data, ('gl', by_year), build)
+    
+    def calculate_grubel_lloyd_aggregate(self, data: pd.DataFrame, by_year: bool = False) -> pd.DataFrame:
+        """Calculate trade-weighted Grubel-Lloyd per country and commodity category
         
-        imports = data[
-            (data['Reporter'] == country) & 
-            (data['Commodity'] == product) & 
-            (data['TradeFlow'] == 'Import')
-        ]['TradeValue'].sum()
+        GL = 1 - sum|X - M| / sum(X + M) over the items of each category, where
+        the category is the prefix of 'Category - Item' commodity labels.
+        """
+        exports, imports = self._export_import_matrices(data, by_year)
+        categories = pd.Index([str(label).split(' - ')[0] for label in exports.columns])
+        codes, names = pd.factorize(categories, sort=True)
+        # One-hot product -> category map; a matrix product sums items per category
+        membership = np.zeros((len(codes), len(names)))
+        membership[np.arange(len(codes)), codes] = 1.0
+        x, m = exports.to_numpy(), imports.to_numpy()
+        imbalance = np.abs(x - m) @ membership
+        total = (x + m) @ membership
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gl = 1 - imbalance / total
+        return pd.DataFrame(gl, index=exports.index, columns=pd.Index(names, name='Category'))
+    
+    def _export_import_matrices(self, data: pd.DataFrame, by_year: bool) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        """Aligned export and import value matrices, aggregated in one pass and cached"""
+        return self._cache.get(data, ('flows', by_year), lambda: self._build_flow_matrices(data, by_year))
+    
+    def _build_flow_matrices(self, data: pd.DataFrame, by_year: bool,
+                             years: Optional[List] = None) -> Tuple[pd.DataFrame, pd.DataFrame]:
+        keys = ['Year', 'Reporter'] if by_year else ['Reporter']
+        where = {'Year': years} if years is not None else None
+        flows = self.get_cube(data).sum(['TradeFlow'] + keys + ['Commodity'], where=where).unstack(
+            'Commodity', fill_value=0.0
+        )
+        rows = flows.index.droplevel('TradeFlow').unique().sort_values()
+        flow_values = flows.index.get_level_values('TradeFlow')
         
-        return 1 - (abs(exports - imports) / (exports + imports))
+        def side(flow):
+            if flow not in flow_values:
+                return pd.DataFrame(0.0, index=rows, columns=flows.columns)
+            return flows.xs(flow, level='TradeFlow').reindex(rows, fill_value=0.0)
+        return side('Export'), side('Import')
     
     def calculate_trade_complementarity(self, data: pd.DataFrame, 
                                       country1: str, country2: str) -> float:
         """Calculate Trade Complementarity Index"""
-        country1_exports = data[
-            (data['Reporter'] == country1) & 
-            (data['TradeFlow'] == 'Export')
-        ]
-        
-        country2_imports = data[
-            (data['Reporter'] == country2) & 
-            (data['TradeFlow'] == 'Import')
-        ]
-        
-        # Calculate product shares
-        country1_export_shares = (
-            country1_exports.groupby('Commodity')['TradeValue'].sum() /
-            country1_exports['TradeValue'].sum()
-        )
+        matrix = self.calculate_complementarity_matrix(data)
+        if country1 not in matrix.index or country2 not in matrix.columns:
+            # A country without exports (or imports) shares no products
+            return 0.0
+        return float(matrix.at[country1, country2])
+    
+    def calculate_complementarity_matrix(self, data: pd.DataFrame,
+                                         max_block_cells: int = 1 << 22) -> pd.DataFrame:
+        """Calculate trade complementarity for every (exporter, importer) pair
         
-        country2_import_shares = (
-            country2_imports.groupby('Commodity')['TradeValue'].sum() /
-            country2_imports['TradeValue'].sum()
+        Entry (j, k) is the sum over products of min(export share of j, import
+        share of k). Exporters are processed in blocks so the broadcast
+        temporaries stay under `max_block_cells` elements.
+        """
+        return self._cache.get(
+            data, ('complementarity', max_block_cells),
+            lambda: self._build_complementarity_matrix(data, max_block_cells)
         )
+    
+    def _build_complementarity_matrix(self, data: pd.DataFrame, max_block_cells: int) -> pd.DataFrame:
+        exports, imports = self._export_import_matrices(data, by_year=False)
+        export_shares = self._row_shares(exports.to_numpy())
+        import_shares = self._row_shares(imports.to_numpy())
         
-        # Calculate complementarity
-        complementarity = 0
-        for product in set(country1_export_shares.index) & set(country2_import_shares.index):
-            complementarity += min(
-                country1_export_shares[product],
-                country2_import_shares[product]
-            )
-        
-        return complementarity
+        n_countries, n_products = export_shares.shape
+        result = np.empty((n_countries, n_countries))
+        block = max(1, max_block_cells // max(n_countries * n_products, 1))
+        for start in range(0, n_countries, block):
+            stop = min(start + block, n_countries)
+            pairwise = np.minimum(export_shares[start:stop, None, :], import_shares[None, :, :])
+            result[start:stop] = pairwise.sum(axis=2)
+        return pd.DataFrame(result, index=exports.index.rename('Exporter'),
+                            columns=imports.index.rename('Importer'))
+    
+    @staticmethod
+    def _row_shares(values: np.ndarray) -> np.ndarray:
+        """Each row divided by its total; rows without trade stay zero"""
+        totals = values.sum(axis=1, keepdims=True)
+        return np.divide(values, totals, out=np.zeros_like(values), where=totals > 0)
+    
+    def rank_complementary_partners(self, data: pd.DataFrame, top_n: int = 5) -> pd.DataFrame:
+        """Rank each exporter's most complementary import markets, best first"""
+        matrix = self.calculate_complementarity_matrix(data)
+        scores = matrix.to_numpy(copy=True)
+        same_country = matrix.index.to_numpy()[:, None] == matrix.columns.to_numpy()[None, :]
+        scores[same_country] = -np.inf
+        top_n = min(top_n, scores.shape[1] - 1)
+        order = np.argsort(-scores, axis=1, kind='stable')[:, :top_n]
+        return pd.DataFrame({
+            'Exporter': np.repeat(matrix.index.to_numpy(), top_n),
+            'Importer': matrix.columns.to_numpy()[order].ravel(),
+            'Complementarity': np.take_along_axis(scores, order, axis=1).ravel(),
+            'Rank': np.tile(np.arange(1, top_n + 1), len(matrix))
+        })
     
     def calculate_trade_potential(self, data: pd.DataFrame, 
                                 country1: str, country2: str) -> float:
         """Calculate Trade Potential Index"""
-        # Implement gravity model components
-        gdp1 = self._get_gdp(country1)
-        gdp2 = self._get_gdp(country2)
-        distance = self._get_distance(country1, country2)
-        
-        # Calculate actual trade
-        actual_trade = data[
-            ((data['Reporter'] == country1) & (data['Partner'] == country2)) |
-            ((data['Reporter'] == country2) & (data['Partner'] == country1))
-        ]['TradeValue'].sum()
-        
-        # Calculate predicted trade using gravity model
-        predicted_trade = (gdp1 * gdp2) / distance
+        # Actual over gravity-predicted trade, both directions and all years combined
+        totals = self._gravity_totals(data)
+        pairs = [(country1, country2), (country2, country1)]
+        if any(pair not in totals.index for pair in pairs):
+            return np.nan
+        selected = totals.loc[pairs]
+        return float(selected['Actual'].sum() / selected['Predicted'].sum())
+    
+    def fit_gravity_model(self, data: pd.DataFrame, method: str = 'ols') -> GravityModel:
+        """Fit the gravity model over every pair and year of `data`, cached per frame"""
+        def build():
+            # Fit on the cube's export totals per year and pair instead of raw rows
+            panel = self.get_cube(data).aggregate(['Year', 'Reporter', 'Partner'], where={'TradeFlow': 'Export'})
+            return self._gravity_reference().unfitted().fit(panel, method=method, flow=None)
+        return self._cache.get(data, ('gravity', method), build)
+    
+    def calculate_trade_potential_matrix(self, data: pd.DataFrame, method: str = 'ols') -> pd.DataFrame:
+        """Actual over gravity-predicted exports for every exporter/importer pair"""
+        return self._cache.get(
+            data, ('trade_potential', method),
+            lambda: self.fit_gravity_model(data, method).trade_potential()
+        )
+    
+    def _gravity_totals(self, data: pd.DataFrame, method: str = 'ols') -> pd.DataFrame:
+        return self._cache.get(
+            data, ('gravity_totals', method),
+            lambda: self.fit_gravity_model(data, method).predict()
+            .groupby(['Exporter', 'Importer'])[['Actual', 'Predicted']].sum()
+        )
+    
+    def _gravity_reference(self) -> GravityModel:
+        """Unfitted model holding the bundled GDP table and distance matrix"""
+        if self._gravity is None:
+            self._gravity = GravityModel()
+        return self._gravity
+    
+    def get_hierarchy(self, data: pd.DataFrame) -> CommodityHierarchy:
+        """HS/SITC hierarchy over the commodities in `data`, built once per frame"""
+        return self._cache.get(
+            data, 'hierarchy', lambda: CommodityHierarchy(self.get_cube(data).labels['Commodity'])
+        )
+    
+    def calculate_level_totals(self, data: pd.DataFrame, level: str,
+                               by: Tuple[str, ...] = ('Reporter',)) -> pd.DataFrame:
+        """Trade per `by` and commodity node at an HS or SITC level, e.g. 'chapter' or 'sitc2'"""
+        by = tuple(by)
+        return self._cache.get(
+            data, ('level', level, by), lambda: self.get_hierarchy(data).rollup(self.get_cube(data), level, by)
+        )
+    
+    def convert_classification(self, data: pd.DataFrame, target: str = 'SITC') -> pd.DataFrame:
+        """`data` re-expressed in HS or SITC codes via the bundled concordance, cached per frame
         
-        return actual_trade / predicted_trade
+        The result is a frame like any other, so RCA, value-chain and level
+        analyses run on it unchanged.
+        """
+        if self._concordance is None:
+            self._concordance = Concordance()
+        return self._cache.get(data, ('classification', target.upper()),
+                               lambda: self._concordance.convert(data, target))
+    
+    def _row_nodes(self, data: pd.DataFrame, level: str) -> np.ndarray:
+        """Node id of each row's commodity at `level`, cached per frame"""
+        return self._cache.get(
+            data, ('row_nodes', level), lambda: self.get_hierarchy(data).node_codes(level, data['Commodity'])
+        )
     
     def analyze_value_chain(self, data: pd.DataFrame, product: str) -> pd.DataFrame:
         """Analyze value chain for a specific product"""
-        # Group by production stage
-        stages = {
-            'raw_materials': ['0', '1', '2', '3'],
-            'intermediate': ['5', '6'],
-            'final': ['7', '8']
-        }
+        # Group by production stage, via each row's SITC section
+        sections = self.get_hierarchy(data).nodes['sitc1']
+        # The trailing slot catches rows without a SITC section (node id -1)
+        node_stage = np.full(len(sections) + 1, -1)
+        for i, codes in enumerate(VALUE_CHAIN_STAGES.values()):
+            positions = sections.get_indexer(codes)
+            node_stage[positions[positions >= 0]] = i
+        stage = node_stage[self._row_nodes(data, 'sitc1')]
         
-        analysis = pd.DataFrame()
-        for stage, codes in stages.items():
-            stage_data = data[data['Commodity'].str.startswith(tuple(codes))]
-            analysis[stage] = [
-                stage_data['TradeValue'].sum(),
-                stage_data['TradeValue'].mean(),
-                stage_data['TradeValue'].std()
-            ]
-        
-        return analysis
+        in_stage = stage >= 0
+        stage, values = stage[in_stage], data['TradeValue'].to_numpy(dtype=float)[in_stage]
+        n_stages = len(VALUE_CHAIN_STAGES)
+        count = np.bincount(stage, minlength=n_stages)
+        total = np.bincount(stage, weights=values, minlength=n_stages)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = total / count
+            squares = np.bincount(stage, weights=(values - mean[stage]) ** 2, minlength=n_stages)
+            # Sample std, NaN below two rows as in Series.std()
+            std = np.where(count > 1, np.sqrt(squares / np.maximum(count - 1, 1)), np.nan)
+        # Rows 0/1/2 hold the total, mean and std, as before
+        return pd.DataFrame([total, mean, std], columns=list(VALUE_CHAIN_STAGES))
     
     def calculate_tiva(self, data: pd.DataFrame, country: str) -> pd.DataFrame:
         """Calculate Trade in Value Added (TiVA) metrics"""
-        # Implementation of TiVA calculation
-        # This is a simplified version - actual TiVA requires input-output tables
-        exports = data[
-            (data['Reporter'] == country) & 
-            (data['TradeFlow'] == 'Export')
-        ]
-        
-        imports = data[
-            (data['Reporter'] == country) & 
-            (data['TradeFlow'] == 'Import')
-        ]
-        
-        domestic_value = exports['TradeValue'].sum() - imports['TradeValue'].sum()
-        foreign_value = imports['TradeValue'].sum()
-        
+        matrix = self.calculate_tiva_matrix(data)
+        row = matrix.reindex([country], fill_value=0.0)
         return pd.DataFrame({
-            'Domestic Value Added': [domestic_value],
-            'Foreign Value Added': [foreign_value],
-            'Total Value Added': [domestic_value + foreign_value]
+            'Domestic Value Added': row['Domestic Value Added'].to_numpy(),
+            'Foreign Value Added': row['Foreign Value Added'].to_numpy(),
+            'Total Value Added': row['Total Value Added'].to_numpy()
         })
     
+    def calculate_tiva_matrix(self, data: pd.DataFrame) -> pd.DataFrame:
+        """Split every reporter's exports into domestic and foreign value added
+        
+        Value-added shares come from the bundled MRIO table (reporters it does
+        not list take the 'Rest of World' shares) and are applied to the
+        exports in `data`. The Leontief factorization behind the shares is
+        shared by every caller of the same table version.
+        """
+        def build():
+            table = self._mrio_table()
+            shares = tiva_engine.decompose(table)[['DVA Share', 'FVA Share']]
+            exports = self.get_cube(data).sum(['Reporter'], where={'TradeFlow': 'Export'})
+            fallback = shares.loc['Rest of World'] if 'Rest of World' in shares.index else np.nan
+            shares = shares.reindex(exports.index).fillna(fallback)
+            domestic = exports.to_numpy() * shares['DVA Share'].to_numpy()
+            foreign = exports.to_numpy() * shares['FVA Share'].to_numpy()
+            return pd.DataFrame({
+                'Gross Exports': exports.to_numpy(),
+                'Domestic Value Added': domestic,
+                'Foreign Value Added': foreign,
+                'Total Value Added': domestic + foreign,
+                'DVA Share': shares['DVA Share'].to_numpy()
+            }, index=exports.index)
+        return self._cache.get(data, 'tiva', build)
+    
+    def _mrio_table(self) -> MRIOTable:
+        """Bundled multi-region input-output table, loaded on first use"""
+        if self._mrio is None:
+            self._mrio = MRIOTable()
+        return self._mrio
+    
     def analyze_tariffs(self, data: pd.DataFrame, country: str) -> pd.DataFrame:
         """Analyze tariff and non-tariff barriers"""
         # Implementation of tariff analysis
@@ -193,48 +495,43 @@ class AdvancedTradeAnalysis:
         return pd.DataFrame()  # Placeholder
     
     def create_sankey_diagram(self, data: pd.DataFrame, 
-                            source_country: str) -> go.Figure:
-        """Create Sankey diagram for trade flows"""
-        # Filter data for source country
-        country_data = data[data['Reporter'] == source_country]
-        
-        # Create nodes
-        nodes = list(set(country_data['Partner'].unique()) | {source_country})
-        
-        # Create links
-        links = []
-        for _, row in country_data.iterrows():
-            links.append({
-                'source': nodes.index(source_country),
-                'target': nodes.index(row['Partner']),
-                'value': row['TradeValue']
-            })
-        
-        # Create figure
-        fig = go.Figure(data=[go.Sankey(
-            node=dict(
-                pad=15,
-                thickness=20,
-                line=dict(color="black", width=0.5),
-                label=nodes,
-                color="blue"
-            ),
-            link=dict(
-                source=[link['source'] for link in links],
-                target=[link['target'] for link in links],
-                value=[link['value'] for link in links]
-            )
-        )])
-        
-        fig.update_layout(title_text=f"Trade Flows from {source_country}")
-        return fig
-    
-    def _get_gdp(self, country: str) -> float:
-        """Get GDP for a country (placeholder)"""
-        # In production, this would fetch from World Bank API
-        return 1.0
+                            source_country: Optional[str] = None,
+                            levels: Tuple[str, ...] = ('Reporter', 'Category', 'Partner'),
+                            top_k: Optional[int] = 10, flow: Optional[str] = None) -> go.Figure:
+        """Create Sankey diagram for trade flows
+        
+        Links are summed from the cube's cells rather than from rows, and
+        'Category' is the commodity category; it is skipped for data without
+        a Commodity column. Each level keeps its `top_k` largest nodes and
+        merges the rest into 'Other'. `flow` restricts to one TradeFlow.
+        """
+        where = {}
+        if source_country is not None:
+            where['Reporter'] = source_country
+        if flow is not None:
+            where['TradeFlow'] = flow
+        cube = self.get_cube(data)
+        if 'Commodity' not in cube.dimensions:
+            levels = tuple(level for level in levels if level != 'Category')
+        dims = [level for level in levels if level != 'Category']
+        if 'Category' in levels:
+            dims.append('Commodity')
+        rollup = cube.cells(dims, where=where)
+        # Categorical columns over the cube's codes, so no label strings are hashed per cell
+        cells = pd.DataFrame({dim: pd.Categorical.from_codes(codes, cube.labels[dim])
+                              for dim, codes in rollup.codes().items()})
+        cells['TradeValue'] = rollup.sums
+        if 'Category' in levels:
+            cells['Category'] = commodity_categories(cells['Commodity'])
+        
+        sankey = build_sankey(cells, levels, top_k=top_k)
+        title = f"Trade Flows from {source_country}" if source_country is not None else "Trade Flows"
+        return create_sankey_figure(sankey, title)
+    
+    def _get_gdp(self, country: str, year: Optional[int] = None) -> float:
+        """Get GDP for a country from the bundled indicator table"""
+        return self._gravity_reference().get_gdp(country, year)
     
     def _get_distance(self, country1: str, country2: str) -> float:
-        """Get distance between countries (placeholder)"""
-        # In production, this would use actual geographic coordinates
-        return 1.0 
\ No newline at end of file
+        """Get great-circle distance between countries in km"""
+        return self._gravity_reference().get_distance(country1, country2)
@@ -0,0 +1,211 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+CUBE_DIMENSIONS = ('Year', 'Reporter', 'Partner', 'Commodity', 'TradeFlow')
+
+class _Rollup:
+    """Sparse cells of one roll-up: mixed-radix cell ids with value sums and row counts"""
+
+    def __init__(self, dims: Tuple[str, ...], shape: Tuple[int, ...],
+                 cells: np.ndarray, sums: np.ndarray, counts: np.ndarray):
+        self.dims = dims
+        self.shape = shape
+        self.cells = cells
+        self.sums = sums
+        self.counts = counts
+
+    def codes(self) -> Dict[str, np.ndarray]:
+        """Per-dimension integer codes of every non-empty cell"""
+        if not self.dims:
+            return {}
+        return dict(zip(self.dims, np.unravel_index(self.cells, self.shape)))
+
+class TradeCube:
+    """Aggregate cube of TradeValue over integer-coded trade dimensions
+
+    Only non-empty cells are stored, as sorted mixed-radix cell ids with the
+    sum of TradeValue and the number of source rows. Roll-ups along any
+    subset of dimensions are derived from the smallest cached finer roll-up
+    and cached in turn, so repeated chart queries cost in proportion to the
+    number of cells rather than the number of rows.
+    """
+
+    def __init__(self, data: pd.DataFrame, dimensions: Optional[Sequence[str]] = None):
+        dimensions = dimensions or [d for d in CUBE_DIMENSIONS if d in data.columns]
+        self.dimensions = tuple(dimensions)
+        self.labels: Dict[str, pd.Index] = {}
+        # Labels in their source dtype, so appended() orders new ones as a rebuild would
+        self._label_values: Dict[str, pd.Series] = {}
+        codes = []
+        for dim in self.dimensions:
+            dim_codes, uniques = pd.factorize(data[dim], sort=True)
+            self._set_labels(dim, uniques)
+            codes.append(dim_codes)
+        self.n_rows = len(data)
+        self._lock = threading.Lock()
+        self._rollups: Dict[Tuple[str, ...], _Rollup] = {}
+        values = data['TradeValue'].to_numpy(dtype=float)
+        # Rows with a missing dimension value (code -1) are dropped, as groupby does
+        complete = _complete_rows(codes, len(values))
+        self._base = self._aggregate(self.dimensions, [c[complete] for c in codes], values[complete],
+                                     np.ones(int(complete.sum()), dtype=np.int64))
+        self._rollups[self.dimensions] = self._base
+
+    @property
+    def n_cells(self) -> int:
+        return len(self._base.cells)
+
+    def _set_labels(self, dim: str, uniques):
+        self._label_values[dim] = pd.Series(uniques)
+        self.labels[dim] = pd.Index(np.asarray(uniques), name=dim)
+
+    def _shape(self, dims) -> Tuple[int, ...]:
+        return tuple(len(self.labels[d]) for d in dims)
+
+    def _aggregate(self, dims, codes, sums, counts) -> _Rollup:
+        shape = self._shape(dims)
+        if not dims:
+            return _Rollup(dims, shape, np.zeros(1 if len(sums) else 0, dtype=np.int64),
+                           np.array([sums.sum()]) if len(sums) else np.zeros(0),
+                           np.array([counts.sum()]) if len(sums) else np.zeros(0, dtype=np.int64))
+        cell_ids = np.ravel_multi_index(codes, shape) if len(sums) else np.zeros(0, dtype=np.int64)
+        cells, inverse = np.unique(cell_ids, return_inverse=True)
+        return _Rollup(dims, shape, cells,
+                       np.bincount(inverse, weights=sums, minlength=len(cells)),
+                       np.bincount(inverse, weights=counts, minlength=len(cells)).astype(np.int64))
+
+    def rollup(self, dims: Sequence[str]) -> _Rollup:
+        """Cached roll-up onto `dims`, kept in the given dimension order"""
+        dims = tuple(dims)
+        unknown = set(dims) - set(self.dimensions)
+        if unknown:
+            raise KeyError(f"Not a cube dimension: {', '.join(sorted(unknown))}")
+        with self._lock:
+            cached = self._rollups.get(dims)
+            if cached is not None:
+                return cached
+            # Start from the smallest cached roll-up that still has every requested dimension
+            source = min((r for key, r in self._rollups.items() if set(dims) <= set(key)),
+                         key=lambda r: len(r.cells))
+            source_codes = source.codes()
+            rollup = self._aggregate(dims, [source_codes[d] for d in dims], source.sums, source.counts)
+            self._rollups[dims] = rollup
+            return rollup
+
+    def appended(self, rows: pd.DataFrame) -> 'TradeCube':
+        """Return a new cube that also covers `rows`, leaving this one unchanged
+
+        Existing cells are re-coded onto the extended labels and merged with
+        the aggregated new rows, so the cost depends on the number of cells
+        and new rows, not on the history. Cached roll-ups are carried forward
+        the same way.
+        """
+        cube = object.__new__(TradeCube)
+        cube.dimensions = self.dimensions
+        cube.labels = {}
+        cube._label_values = {}
+        recode = {}
+        delta_codes = {}
+        for dim in self.dimensions:
+            # Factorizing old and new labels together orders them as concatenating the data would
+            row_codes, row_uniques = pd.factorize(rows[dim])
+            _, uniques = pd.factorize(pd.concat([self._label_values[dim], pd.Series(row_uniques)],
+                                                ignore_index=True), sort=True)
+            cube._set_labels(dim, uniques)
+            recode[dim] = cube.labels[dim].get_indexer(self.labels[dim])
+            delta_codes[dim] = np.where(row_codes >= 0,
+                                        cube.labels[dim].get_indexer(np.asarray(row_uniques))[row_codes], -1)
+        cube.n_rows = self.n_rows + len(rows)
+        cube._lock = threading.Lock()
+        cube._rollups = {}
+        complete = _complete_rows(list(delta_codes.values()), len(rows))
+        delta_codes = {dim: dim_codes[complete] for dim, dim_codes in delta_codes.items()}
+        delta_sums = rows['TradeValue'].to_numpy(dtype=float)[complete]
+        delta_counts = np.ones(len(delta_sums), dtype=np.int64)
+
+        with self._lock:
+            rollups = dict(self._rollups)
+        for dims, rollup in rollups.items():
+            codes = rollup.codes()
+            merged_codes = [np.concatenate([recode[d][codes[d]], delta_codes[d]]) for d in dims]
+            cube._rollups[dims] = cube._aggregate(
+                dims, merged_codes,
+                np.concatenate([rollup.sums, delta_sums]),
+                np.concatenate([rollup.counts, delta_counts])
+            )
+        cube._base = cube._rollups[cube.dimensions]
+        return cube
+
+    def prepare(self, *rollups: Sequence[str]) -> 'TradeCube':
+        """Compute roll-ups ahead of the first query, finest first so later ones derive cheaply"""
+        for dims in sorted(rollups, key=len, reverse=True):
+            self.rollup(dims)
+        return self
+
+    def cells(self, by: Sequence[str], where: Optional[Dict[str, object]] = None) -> _Rollup:
+        """Non-empty cells of the roll-up onto `by`, restricted to the `where` slice
+
+        Codes index into `labels`, so callers can map them through their own
+        lookup arrays without touching label strings.
+        """
+        by = list(by)
+        where = where or {}
+        dims = tuple(by + [d for d in where if d not in by])
+        rollup = self.rollup(dims)
+        if not where:
+            return rollup
+        codes = rollup.codes()
+        keep = np.ones(len(rollup.cells), dtype=bool)
+        for dim, values in where.items():
+            wanted = self.labels[dim].get_indexer(_as_list(values))
+            keep &= np.isin(codes[dim], wanted[wanted >= 0])
+
+        if len(by) < len(dims):
+            return self._aggregate(tuple(by), [codes[d][keep] for d in by],
+                                   rollup.sums[keep], rollup.counts[keep])
+        return _Rollup(rollup.dims, rollup.shape, rollup.cells[keep],
+                       rollup.sums[keep], rollup.counts[keep])
+
+    def aggregate(self, by: Sequence[str], where: Optional[Dict[str, object]] = None) -> pd.DataFrame:
+        """Sum, count and mean of TradeValue per combination of `by`, like a sorted groupby
+
+        `where` restricts cells by dimension value, e.g. {'TradeFlow': 'Export'}
+        or {'Year': [2020, 2021]}.
+        """
+        result = self.cells(by, where)
+        columns = {dim: self.labels[dim][dim_codes] for dim, dim_codes in result.codes().items()}
+        columns['TradeValue'] = result.sums
+        columns['Count'] = result.counts
+        frame = pd.DataFrame(columns)
+        frame['Mean'] = frame['TradeValue'] / frame['Count']
+        return frame
+
+    def sum(self, by: Sequence[str], where: Optional[Dict[str, object]] = None) -> pd.Series:
+        """TradeValue totals indexed by `by`, matching data.groupby(by)['TradeValue'].sum()"""
+        frame = self.aggregate(by, where)
+        index = frame.set_index(list(by)).index if by else None
+        return pd.Series(frame['TradeValue'].to_numpy(), index=index, name='TradeValue')
+
+    def total(self, where: Optional[Dict[str, object]] = None) -> float:
+        """Total TradeValue over the whole cube or the `where` slice"""
+        frame = self.aggregate([], where)
+        return float(frame['TradeValue'].sum())
+
+    def count(self, where: Optional[Dict[str, object]] = None) -> int:
+        """Number of source rows in the whole cube or the `where` slice"""
+        frame = self.aggregate([], where)
+        return int(frame['Count'].sum())
+
+def _complete_rows(codes: Sequence[np.ndarray], n_rows: int) -> np.ndarray:
+    """Rows whose every dimension code is valid; factorize codes missing values as -1"""
+    complete = np.ones(n_rows, dtype=bool)
+    for dim_codes in codes:
+        complete &= dim_codes >= 0
+    return complete
+
+def _as_list(values) -> list:
+    if isinstance(values, (str, bytes)) or not isinstance(values, Iterable):
+        return [values]
+    return list(values)
@@ -3,6 +3,7 @@ import plotly.graph_objects as go
 import pandas as pd
 import numpy as np
 from typing import Dict, Tuple, Optional
+from country_coordinates import attach_country_coordinates
 
 class TradeVisualization:
     def __init__(self):
@@ -392,8 +393,16 @@ class TradeVisualization:
 
 class TradeVisualization:
     @staticmethod
-    def create_trade_flow_map(df, title="Trade Flow Map"):
-        """Create an interactive trade flow map"""
+    def create_trade_flow_map(df, title="Trade Flow Map", countries=None):
+        """Create an interactive trade flow map
+        
+        Star-schema facts carry no coordinates; pass the `countries`
+        dimension table to look them up. Frames with country names but no
+        coordinates use the built-in country table.
+        """
+        if 'Reporter_Lat' not in df.columns:
+            df = attach_country_coordinates(df, countries)
+        
         fig = go.Figure()
         
         # Add trade flow lines
@@ -420,10 +429,13 @@ class TradeVisualization:
         return fig
     
     @staticmethod
-    def create_trade_balance_chart(df, title="Trade Balance Over Time"):
-        """Create a trade balance chart"""
+    def create_trade_balance_chart(df, title="Trade Balance Over Time", cube=None):
+        """Create a trade balance chart, reading totals from `cube` when one is given"""
         # Calculate trade balance
-        trade_balance = df.groupby(['Year', 'Reporter', 'TradeFlow'])['TradeValue'].sum().unstack()
+        if cube is not None:
+            trade_balance = cube.sum(['Year', 'Reporter', 'TradeFlow']).unstack()
+        else:
+            trade_balance = df.groupby(['Year', 'Reporter', 'TradeFlow'])['TradeValue'].sum().unstack()
         trade_balance['Balance'] = trade_balance['Export'] - trade_balance['Import']
         
         fig = go.Figure()